@@ -0,0 +1,110 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import CustomUser
+from .cache import LocalLRUCache
+from .tokens import AccessToken
+
+TOKEN_VERSION_KEY = 'token_version:{}'
+# Версия в кэше для удалённых и неактивных пользователей
+REVOKED = -1
+
+# Пользователи, загруженные CachedJWTAuthentication, по user_id
+user_cache = LocalLRUCache(
+    settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TIMEOUT
+)
+
+
+def get_token_for_user(user):
+    # Роль в токене позволяет не загружать пользователя;
+    # refresh-токен не создаётся
+    token = AccessToken.for_user(user)
+    for field in CustomUser.TOKEN_CLAIM_FIELDS:
+        if field != 'is_active':
+            token[field] = getattr(user, field)
+    token['token_version'] = user.token_version
+    return token
+
+
+def get_token_version(user_id, refresh=False):
+    # Версия живёт в кэше AUTH_USER_CACHE_TIMEOUT секунд: за это время
+    # другие процессы узнают об отзыве токенов
+    key = TOKEN_VERSION_KEY.format(user_id)
+    version = None if refresh else cache.get(key)
+    if version is None:
+        version = CustomUser.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        version = REVOKED if version is None else version
+        cache.set(key, version, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+    return version
+
+
+def set_token_version(user):
+    cache.set(
+        TOKEN_VERSION_KEY.format(user.pk),
+        user.token_version if user.is_active else REVOKED,
+        timeout=settings.AUTH_USER_CACHE_TIMEOUT,
+    )
+
+
+def revoke_token_version(user):
+    cache.set(
+        TOKEN_VERSION_KEY.format(user.pk), REVOKED,
+        timeout=settings.AUTH_USER_CACHE_TIMEOUT,
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    # Пользователи кэшируются в процессе на AUTH_USER_CACHE_TIMEOUT секунд
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        return copy.copy(user)
+
+
+class StatelessJWTAuthentication(CachedJWTAuthentication):
+    # Пользователь собирается из полей токена и сверяется с версией
+    # токенов в кэше, без запроса к БД
+    claims = ('username', 'role', 'is_superuser', 'token_version')
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in self.claims):
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        token_version = validated_token['token_version']
+        version = get_token_version(user_id)
+        if REVOKED < version < token_version:
+            # Версия увеличилась в другом процессе, у этого она устарела
+            version = get_token_version(user_id, refresh=True)
+        if version != token_version:
+            raise AuthenticationFailed(
+                'Token has been revoked.', code='token_revoked'
+            )
+        user = CustomUser(
+            pk=user_id,
+            username=validated_token['username'],
+            role=validated_token['role'],
+            is_superuser=validated_token['is_superuser'],
+            token_version=validated_token['token_version'],
+        )
+        user._state.adding = False
+        user.from_token_claims = True
+        return user
+
+
+def get_full_user(user):
+    # Строка БД для пользователя, собранного из токена
+    if getattr(user, 'from_token_claims', False):
+        return CustomUser.objects.get(pk=user.pk)
+    return user
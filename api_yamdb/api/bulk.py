@@ -0,0 +1,199 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from reviews.models import Category, Genre, GenreTitle, Title
+from reviews.search import get_search_backend
+from users.models import CustomUser
+from .cache import bump_versions
+from .signals import get_instance_scopes
+
+
+def bulk_error(errors):
+    return {'status': status.HTTP_400_BAD_REQUEST, 'errors': errors}
+
+
+def bulk_response(results):
+    # 201, если создано всё, 207, если часть элементов с ошибками
+    statuses = {result['status'] for result in results}
+    if statuses == {status.HTTP_201_CREATED}:
+        response_status = status.HTTP_201_CREATED
+    elif max(statuses) < status.HTTP_400_BAD_REQUEST:
+        response_status = status.HTTP_200_OK
+    else:
+        response_status = status.HTTP_207_MULTI_STATUS
+    return Response(results, status=response_status)
+
+
+def validate_bulk_items(request, serializer_class):
+    # Возвращает результаты с ошибками и (индекс, данные) валидных элементов
+    items = request.data
+    if not isinstance(items, list) or not items:
+        raise ValidationError('Ожидается непустой список объектов.')
+    if len(items) > settings.BULK_CREATE_MAX_ITEMS:
+        raise ValidationError(
+            f'Не больше {settings.BULK_CREATE_MAX_ITEMS} объектов за запрос.'
+        )
+
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = bulk_error(serializer.errors)
+    return results, valid
+
+
+def resolve_authors(request, results, valid):
+    # Авторы разрешаются одним запросом; указывать чужое авторство могут
+    # только модераторы и администраторы
+    user = request.user
+    privileged = user.is_admin or user.is_moderator
+    usernames = {data['author'] for _, data in valid if 'author' in data}
+    authors = {
+        author.username: author
+        for author in CustomUser.objects.filter(username__in=usernames)
+    }
+    authors[user.username] = user
+    resolved = []
+    for index, data in valid:
+        author = authors.get(data.get('author', user.username))
+        if author is None:
+            results[index] = bulk_error(
+                {'author': ['Пользователь не найден.']}
+            )
+        elif author != user and not privileged:
+            results[index] = bulk_error({'author': [
+                'Указывать автора могут только модераторы и администраторы.'
+            ]})
+        else:
+            resolved.append((index, {**data, 'author': author}))
+    return resolved
+
+
+def bulk_create_with_pks(model, objs, key_fields, candidates):
+    # SQLite не возвращает pk после bulk_create, они дочитываются из
+    # candidates по key_fields; вызывать внутри транзакции
+    model.objects.bulk_create(objs)
+    if not objs or objs[0].pk is not None:
+        return objs
+    pks = defaultdict(list)
+    for pk, *key in candidates.order_by('pk').values_list('pk', *key_fields):
+        pks[tuple(key)].append(pk)
+    for obj in objs:
+        obj.pk = pks[tuple(getattr(obj, field) for field in key_fields)].pop(0)
+    return objs
+
+
+def after_bulk_write(objs):
+    # Работа пропущенных сигналов post_save: поиск и версии кэша
+    if not objs:
+        return
+    get_search_backend().index(objs)
+    scopes = {objs[0]._meta.db_table}
+    for obj in objs:
+        scopes.update(get_instance_scopes(obj))
+    bump_versions(scopes)
+
+
+def get_by_slug(model, slugs):
+    return {obj.slug: obj for obj in model.objects.filter(slug__in=slugs)}
+
+
+def get_title_errors(data, existing, categories, genres):
+    errors = {}
+    if 'id' in data and data['id'] not in existing:
+        errors['id'] = ['Произведение не найдено.']
+    if data.get('category') and data['category'] not in categories:
+        errors['category'] = [f'Категория {data["category"]} не найдена.']
+    missing = [slug for slug in data.get('genre', ()) if slug not in genres]
+    if missing:
+        errors['genre'] = [f'Жанр {slug} не найден.' for slug in missing]
+    return errors
+
+
+def build_titles(results, valid):
+    # Элементы с id обновляют произведение, остальные создают новое;
+    # слаги разрешаются одним запросом на модель
+    categories = get_by_slug(Category, {
+        data['category'] for _, data in valid if data.get('category')
+    })
+    genres = get_by_slug(Genre, {
+        slug for _, data in valid for slug in data.get('genre', ())
+    })
+    existing = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).in_bulk([data['id'] for _, data in valid if 'id' in data])
+
+    titles, title_genres = {}, {}
+    for index, data in valid:
+        errors = get_title_errors(data, existing, categories, genres)
+        if errors:
+            results[index] = bulk_error(errors)
+            continue
+        title = existing.get(data.get('id')) or Title()
+        for field in ('name', 'year', 'description'):
+            if field in data:
+                setattr(title, field, data[field])
+        if 'category' in data:
+            title.category = categories.get(data['category'])
+        if 'genre' in data:
+            title_genres[index] = [
+                genres[slug] for slug in dict.fromkeys(data['genre'])
+            ]
+        titles[index] = title
+    return titles, title_genres
+
+
+def write_titles(titles, title_genres):
+    # Жанры существующего произведения заменяются переданными;
+    # возвращает индексы созданных произведений
+    created = {index for index, title in titles.items() if title.pk is None}
+    new_titles = [titles[index] for index in created]
+    updated_titles = list({
+        title.pk: title
+        for index, title in titles.items() if index not in created
+    }.values())
+    with transaction.atomic():
+        last_pk = Title.objects.aggregate(last=Max('pk'))['last'] or 0
+        bulk_create_with_pks(
+            Title, new_titles, ('name', 'year', 'description', 'category_id'),
+            Title.objects.filter(pk__gt=last_pk),
+        )
+        Title.objects.bulk_update(
+            updated_titles, ('name', 'year', 'description', 'category')
+        )
+        GenreTitle.objects.filter(title__in=[
+            titles[index] for index in title_genres if index not in created
+        ]).delete()
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title=titles[index], genre=genre)
+            for index, genres in title_genres.items()
+            for genre in genres
+        )
+    after_bulk_write(new_titles + updated_titles)
+    bump_versions([GenreTitle._meta.db_table])
+    return created
+
+
+def get_title_result(title, genres, created):
+    return {
+        'status': (
+            status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        ),
+        'data': {
+            'id': title.pk,
+            'name': title.name,
+            'year': title.year,
+            'description': title.description,
+            'genre': [genre.slug for genre in genres],
+            'category': title.category.slug if title.category else None,
+        },
+    }
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'version:{}'
+
+TITLE_SCOPE = 'title:{}'
+TITLE_REVIEWS_SCOPE = 'title:{}:reviews'
+REVIEW_COMMENTS_SCOPE = 'review:{}:comments'
+# Имена пользователей, которые выводятся в отзывах и комментариях
+USERNAMES_SCOPE = 'users:usernames'
+
+
+def get_versions(scopes):
+    # Версия области (таблицы или объекта) — время последней записи в нс.
+    # Она живёт CACHE_VERSION_TIMEOUT секунд, затем создаётся новая
+    keys = {VERSION_KEY.format(scope): scope for scope in scopes}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, time.time_ns(), timeout=settings.CACHE_VERSION_TIMEOUT)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_versions(scopes):
+    version = time.time_ns()
+    cache.set_many(
+        {VERSION_KEY.format(scope): version for scope in scopes},
+        timeout=settings.CACHE_VERSION_TIMEOUT,
+    )
+
+
+def get_queryset_tables(queryset):
+    return sorted(
+        {join.table_name for join in queryset.query.alias_map.values()}
+        | {queryset.model._meta.db_table}
+    )
+
+
+class LocalLRUCache:
+    # LRU-кэш процесса со сроком жизни записей
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -1,25 +1,43 @@
+from django.db.models import Value
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Lower
 from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
 
 from reviews.models import Title
 
 
+def filter_lower(qs, field_name, value):
+    return qs.alias(lower=Lower(field_name)).filter(lower=Lower(Value(value)))
+
+
+class LowerCharFilter(filters.CharFilter):
+    # Без учёта регистра, но, в отличие от iexact, через Lower(), который
+    # может использовать индекс по Lower(поле). Поля связанных моделей
+    # сравниваются в подзапросе: alias() присоединил бы их через LEFT JOIN
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        *relations, field_name = self.field_name.split(LOOKUP_SEP)
+        if not relations:
+            qs = filter_lower(qs, field_name, value)
+        else:
+            model = qs.model
+            for relation in relations:
+                model = model._meta.get_field(relation).related_model
+            qs = qs.filter(**{
+                LOOKUP_SEP.join(relations + ['in']): filter_lower(
+                    model.objects.all(), field_name, value
+                )
+            })
+        return qs.distinct() if self.distinct else qs
+
+
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='iexact'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='iexact'
-    )
-    name = filters.CharFilter(
-        field_name='name',
-        lookup_expr='iexact'
-    )
-    year = filters.NumberFilter(
-        field_name='year',
-        lookup_expr='iexact'
-    )
+    category = LowerCharFilter(field_name='category__slug')
+    genre = LowerCharFilter(field_name='genre__slug')
+    name = LowerCharFilter(field_name='name')
+    year = filters.NumberFilter(field_name='year')
 
     class Meta:
         model = Title
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management import BaseCommand, CommandError
+from rest_framework_simplejwt.state import token_backend
+
+from api.authentication import get_token_for_user
+from api.tokens import get_token_backend
+from users.models import CustomUser
+
+BACKENDS = {
+    'pyjwt': lambda: token_backend,
+    'hmac': lambda: get_token_backend('api.tokens.HMACTokenBackend'),
+}
+
+
+class Command(BaseCommand):
+    # Замер скорости выпуска и проверки JWT на одном ядре
+    help = 'Measure single-core JWT issue and verify throughput per backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'backends', nargs='*',
+            help='Token backends to measure, all by default: ' + ', '.join(
+                BACKENDS
+            ),
+        )
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        backends = options['backends'] or list(BACKENDS)
+        unknown = set(backends) - BACKENDS.keys()
+        if unknown:
+            raise CommandError(f'Unknown backends: {", ".join(unknown)}')
+
+        # Токен с теми же полями, что выдаёт ObtainTokenView
+        user = CustomUser(pk=1, username='benchmark', role=CustomUser.USER)
+        payload = get_token_for_user(user).payload
+        iterations = options['iterations']
+        for name in backends:
+            backend = BACKENDS[name]()
+            token = backend.encode(payload)
+            self.report(name, 'issue', iterations, self.measure(
+                backend.encode, payload, iterations
+            ))
+            self.report(name, 'verify', iterations, self.measure(
+                backend.decode, token, iterations
+            ))
+
+    def measure(self, function, argument, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            function(argument)
+        return time.perf_counter() - started
+
+    def report(self, backend, operation, iterations, elapsed):
+        self.stdout.write(
+            f'{backend:>5} {operation:>6}: {iterations / elapsed:,.0f} '
+            f'tokens/s per core, {elapsed / iterations * 1e6:.1f} us/token'
+        )
@@ -1,9 +1,82 @@
-from rest_framework import filters, mixins, viewsets
+import hashlib
 
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.response import Response
+
+from .cache import get_versions
+from .pagination import KeysetPagination
 from .permissions import IsAdminOrReadOnly
 
 
+RESPONSE_CACHE_KEY = 'response:{}'
+
+
+class CachedListMixin:
+    # Списки отдаются из кэша по URL и версиям таблиц cache_models
+    cache_models = ()
+    cache_anonymous_only = False
+
+    def list(self, request, *args, **kwargs):
+        if self.cache_anonymous_only and request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        versions = get_versions(
+            model._meta.db_table for model in self.cache_models
+        )
+        key = RESPONSE_CACHE_KEY.format(hashlib.md5(repr((
+            request.build_absolute_uri(), sorted(versions.items())
+        )).encode()).hexdigest())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+
+class ConditionalGetMixin:
+    # ETag и Last-Modified строятся из версий get_validator_scopes();
+    # совпавший валидатор получает 304 без запросов к БД
+
+    def get_validator_scopes(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_get(self, handler, request, *args, **kwargs):
+        versions = get_versions(self.get_validator_scopes())
+        etag = quote_etag(hashlib.md5(repr((
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+            sorted(versions.items()),
+        )).encode()).hexdigest())
+        last_modified = max(versions.values()) // 10 ** 9
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
 class ListCreateDestroyViewSet(
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -13,3 +86,18 @@ class ListCreateDestroyViewSet(
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+
+
+class KeysetPaginationMixin:
+    # Пагинация по курсору при ?pagination=cursor
+    keyset_pagination_class = KeysetPagination
+    pagination_mode_query_param = 'pagination'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and (
+            self.request.query_params.get(self.pagination_mode_query_param)
+            == 'cursor'
+        ):
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
@@ -0,0 +1,144 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, PageNumberPagination
+)
+
+from .cache import get_queryset_tables, get_versions
+
+COUNT_CACHE_KEY = 'pagination-count:{}'
+
+
+class CachedCountPaginator(Paginator):
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+class CachedCountPagination(PageNumberPagination):
+    # count берётся из счётчика родителя или из кэша по запросу и версиям
+    # его таблиц; меньше PAGINATION_EXACT_COUNT_THRESHOLD считается точно
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, queryset, page_size):
+        return CachedCountPaginator(
+            queryset, page_size, count=self.get_count(queryset)
+        )
+
+    def get_count(self, queryset):
+        get_pagination_count = getattr(
+            self.view, 'get_pagination_count', None
+        )
+        if get_pagination_count is not None:
+            count = get_pagination_count()
+            if count is not None:
+                return count
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        versions = get_versions(get_queryset_tables(queryset))
+        key = COUNT_CACHE_KEY.format(hashlib.md5(
+            repr((sql, params, sorted(versions.items()))).encode()
+        ).hexdigest())
+
+        count = cache.get(key)
+        if count is None or count < settings.PAGINATION_EXACT_COUNT_THRESHOLD:
+            count = queryset.count()
+            cache.set(
+                key, count, timeout=settings.PAGINATION_COUNT_CACHE_TIMEOUT
+            )
+        return count
+
+
+class KeysetPagination(CursorPagination):
+    # Курсор по уникальной паре (pub_date, id): страница читается
+    # диапазоном после курсора, без OFFSET и COUNT(*)
+    ordering = ('pub_date', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, position = False, None
+        else:
+            reverse = self.cursor.reverse
+            position = self._parse_position(self.cursor.position)
+
+        if reverse:
+            queryset = queryset.order_by('-pub_date', '-id')
+        else:
+            queryset = queryset.order_by('pub_date', 'id')
+
+        if position is not None:
+            pub_date, pk = position
+            lookup = 'lt' if reverse else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'pub_date__{lookup}': pub_date})
+                | Q(pub_date=pub_date, **{f'id__{lookup}': pk})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > len(self.page)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(
+            self.page[-1], self.ordering
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(
+            self.page[0], self.ordering
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f'{instance.pub_date.isoformat()}|{instance.pk}'
+
+    def _parse_position(self, position):
+        if position is None:
+            return None
+        pub_date, _, pk = position.rpartition('|')
+        pub_date = parse_datetime(pub_date)
+        if pub_date is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, int(pk)
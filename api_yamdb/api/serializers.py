@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
 
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from django.contrib.auth.tokens import default_token_generator
 from django.core.validators import RegexValidator
 
+from users.confirmation import use_confirmation_code
 from users.models import CustomUser
 from reviews.models import (
     Title,
@@ -20,19 +21,10 @@ class ObtainTokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(required=True)
 
     def validate(self, data):
-        username = data.get('username')
-        confirmation_code = data.get('confirmation_code')
-
-        if not all([username, confirmation_code]):
-            raise serializers.ValidationError(
-                "Both username and confirmation code are required."
-            )
-
-        user = get_object_or_404(CustomUser, username=username)
-
-        if user.confirmation_code != confirmation_code:
+        user = get_object_or_404(CustomUser, username=data["username"])
+        if not use_confirmation_code(user, data["confirmation_code"]):
             raise serializers.ValidationError("Invalid confirmation code.")
-
+        data["user"] = user
         return data
 
 
@@ -46,23 +38,31 @@ class SignUpSerializer(serializers.Serializer):
     def validate_username(self, value):
         if value == "me":
             raise serializers.ValidationError('Username "me" is restricted.')
-
-        if CustomUser.objects.filter(username=value).exists():
-            user = CustomUser.objects.get(username=value)
-            if user.email != self.initial_data.get("email"):
-                raise serializers.ValidationError(
-                    "Username already exists with a different email."
-                )
         return value
 
-    def validate_email(self, value):
-        if CustomUser.objects.filter(email=value).exists():
-            user = CustomUser.objects.get(email=value)
-            if user.username != self.initial_data.get("username"):
-                raise serializers.ValidationError(
+    def validate(self, data):
+        # Один запрос по username или email; найденный пользователь
+        # передаётся представлению в data["user"]
+        username, email = data["username"], data["email"]
+        user = None
+        errors = {}
+        for candidate in CustomUser.objects.filter(
+                Q(username=username) | Q(email=email)
+        ):
+            if candidate.username == username and candidate.email == email:
+                user = candidate
+            elif candidate.username == username:
+                errors["username"] = [
+                    "Username already exists with a different email."
+                ]
+            else:
+                errors["email"] = [
                     "Email already exists with a different username."
-                )
-        return value
+                ]
+        if errors:
+            raise serializers.ValidationError(errors)
+        data["user"] = user
+        return data
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -87,14 +87,6 @@ class UserSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Email already exists.")
         return value
 
-    def create(self, validated_data):
-        user = super().create(validated_data)
-        confirmation_code = default_token_generator.make_token(user)
-        user.confirmation_code = confirmation_code
-        user.save()
-
-        return user
-
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -137,7 +129,34 @@ class TitleCreateSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = "__all__"
+        fields = [
+            "id",
+            "name",
+            "year",
+            "description",
+            "genre",
+            "category",
+        ]
+        model = Title
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    # Слаги категории и жанров разрешает представление
+    id = serializers.IntegerField(required=False)
+    category = serializers.SlugField(required=False, allow_null=True)
+    genre = serializers.ListField(
+        child=serializers.SlugField(), required=False
+    )
+
+    class Meta:
+        fields = [
+            "id",
+            "name",
+            "year",
+            "description",
+            "genre",
+            "category",
+        ]
         model = Title
 
 
@@ -165,16 +184,6 @@ class ReviewSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def validate(self, data):
-        if self.context["request"].method == "POST":
-            user = self.context["request"].user
-            title_id = self.context["view"].kwargs.get("title_id")
-            if Review.objects.filter(
-                    author_id=user.id, title_id=title_id
-            ).exists():
-                raise serializers.ValidationError("Отзыв уже оставлен.")
-        return data
-
 
 class CommentSerializer(serializers.ModelSerializer):
     author = SlugRelatedField(
@@ -186,3 +195,11 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         exclude = ("review",)
         model = Comment
+
+
+class ReviewBulkSerializer(ReviewSerializer):
+    author = serializers.CharField(required=False)
+
+
+class CommentBulkSerializer(CommentSerializer):
+    author = serializers.CharField(required=False)
@@ -0,0 +1,90 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Comment, GenreTitle, Review, Title
+from users.models import CustomUser
+from .authentication import (
+    revoke_token_version,
+    set_token_version,
+    user_cache,
+)
+from .cache import (
+    REVIEW_COMMENTS_SCOPE,
+    TITLE_REVIEWS_SCOPE,
+    TITLE_SCOPE,
+    USERNAMES_SCOPE,
+    bump_versions,
+)
+
+
+def get_instance_scopes(instance):
+    if isinstance(instance, Title):
+        return [
+            TITLE_SCOPE.format(instance.pk),
+            TITLE_REVIEWS_SCOPE.format(instance.pk),
+        ]
+    if isinstance(instance, GenreTitle):
+        return [TITLE_SCOPE.format(instance.title_id)]
+    if isinstance(instance, Review):
+        return [
+            TITLE_SCOPE.format(instance.title_id),
+            TITLE_REVIEWS_SCOPE.format(instance.title_id),
+            REVIEW_COMMENTS_SCOPE.format(instance.pk),
+        ]
+    if isinstance(instance, Comment):
+        return [REVIEW_COMMENTS_SCOPE.format(instance.review_id)]
+    return []
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_model_version(sender, instance, **kwargs):
+    if sender is CustomUser:
+        # Версии пользователей обновляют приёмники ниже
+        return
+    bump_versions(
+        [sender._meta.db_table] + get_instance_scopes(instance)
+    )
+
+
+@receiver(m2m_changed)
+def bump_through_version(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    scopes = [sender._meta.db_table]
+    if isinstance(instance, Title):
+        scopes.append(TITLE_SCOPE.format(instance.pk))
+    elif reverse and sender is GenreTitle:
+        scopes.extend(TITLE_SCOPE.format(pk) for pk in pk_set or ())
+    bump_versions(scopes)
+
+
+def username_changed(instance, update_fields):
+    if update_fields is not None and 'username' not in update_fields:
+        return False
+    loaded_claims = getattr(instance, '_loaded_claims', None)
+    return (
+        loaded_claims is None
+        or loaded_claims['username'] != instance.username
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+def update_token_version(sender, instance, created, update_fields,
+                         **kwargs):
+    user_cache.delete(instance.pk)
+    set_token_version(instance)
+    # Сохранение кода подтверждения и других полей не сбрасывает ETag
+    # отзывов и комментариев: их меняет только смена имени
+    if created:
+        bump_versions([sender._meta.db_table])
+    elif username_changed(instance, update_fields):
+        bump_versions([sender._meta.db_table, USERNAMES_SCOPE])
+
+
+@receiver(post_delete, sender=CustomUser)
+def revoke_user_tokens(sender, instance, **kwargs):
+    user_cache.delete(instance.pk)
+    revoke_token_version(instance)
+    bump_versions([sender._meta.db_table, USERNAMES_SCOPE])
@@ -0,0 +1,67 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import ScopedRateThrottle
+
+from .cache import LocalLRUCache
+
+# Ключи, исчерпавшие корзину, и время, до которого запросы отклоняются
+blocked = LocalLRUCache(
+    settings.THROTTLE_LOCAL_CACHE_SIZE, settings.THROTTLE_LOCAL_CACHE_TIMEOUT
+)
+
+
+class ScopedTokenBucketThrottle(ScopedRateThrottle):
+    # Корзина токенов на пользователя или IP в кэше Django; опустевшие
+    # корзины запоминаются в процессе. Список в теле стоит токен на элемент
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        self.now = self.timer()
+
+        blocked_until = blocked.get(self.key)
+        if blocked_until is not None and blocked_until > self.now:
+            self.wait_time = blocked_until - self.now
+            return False
+
+        cost = self.get_cost(request)
+        if cost > self.num_requests:
+            # Такой запрос не пройдёт никогда, повтор не поможет
+            raise ValidationError(
+                f'Не больше {self.num_requests} элементов за запрос.'
+            )
+        tokens, updated_at = self.cache.get(
+            self.key, (self.num_requests, self.now)
+        )
+        tokens = min(
+            self.num_requests,
+            tokens + (self.now - updated_at) * self.refill_rate,
+        )
+        if tokens < cost:
+            self.wait_time = (cost - tokens) / self.refill_rate
+            if tokens < 1:
+                blocked.set(
+                    self.key, self.now + (1 - tokens) / self.refill_rate
+                )
+            return False
+        self.cache.set(self.key, (tokens - cost, self.now), self.duration)
+        return True
+
+    def get_cost(self, request):
+        if isinstance(request.data, list):
+            return max(len(request.data), 1)
+        return 1
+
+    @property
+    def refill_rate(self):
+        return self.num_requests / self.duration
+
+    def wait(self):
+        return self.wait_time
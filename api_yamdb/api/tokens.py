@@ -0,0 +1,131 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.encoding import force_bytes
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+
+def base64url_encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def base64url_decode(data):
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+class HMACTokenBackend(TokenBackend):
+    # Ключ HMAC и заголовок готовятся один раз, токены совпадают с PyJWT;
+    # другие алгоритмы и JWKS обрабатывает PyJWT
+    digests = {
+        'HS256': hashlib.sha256,
+        'HS384': hashlib.sha384,
+        'HS512': hashlib.sha512,
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.precomputed = (
+            self.algorithm in self.digests and self.jwks_client is None
+        )
+        if not self.precomputed:
+            return
+        self.mac = hmac.new(
+            force_bytes(self.signing_key), digestmod=self.digests[
+                self.algorithm
+            ]
+        )
+        self.header = base64url_encode(json.dumps(
+            {'typ': 'JWT', 'alg': self.algorithm}, separators=(',', ':')
+        ).encode())
+
+    def sign(self, signing_input):
+        mac = self.mac.copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def encode(self, payload):
+        if not self.precomputed:
+            return super().encode(payload)
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload['aud'] = self.audience
+        if self.issuer is not None:
+            jwt_payload['iss'] = self.issuer
+        signing_input = self.header + b'.' + base64url_encode(json.dumps(
+            jwt_payload, separators=(',', ':'), cls=self.json_encoder
+        ).encode())
+        return (
+            signing_input + b'.' + base64url_encode(self.sign(signing_input))
+        ).decode()
+
+    def decode(self, token, verify=True):
+        if not self.precomputed:
+            return super().decode(token, verify=verify)
+        try:
+            signing_input, signature = force_bytes(token).rsplit(b'.', 1)
+            header, payload = signing_input.split(b'.', 1)
+            header = json.loads(base64url_decode(header))
+            payload = json.loads(base64url_decode(payload))
+            signature = base64url_decode(signature)
+        except (ValueError, binascii.Error):
+            raise TokenBackendError(_('Token is invalid or expired'))
+        if not isinstance(header, dict) or not isinstance(payload, dict):
+            raise TokenBackendError(_('Token is invalid or expired'))
+        if header.get('alg') != self.algorithm:
+            raise TokenBackendError(_('Invalid algorithm specified'))
+        if verify and not (
+            hmac.compare_digest(self.sign(signing_input), signature)
+            and self.check_claims(payload)
+        ):
+            raise TokenBackendError(_('Token is invalid or expired'))
+        return payload
+
+    def check_claims(self, payload):
+        now = time.time()
+        leeway = self.get_leeway().total_seconds()
+        for claim in ('exp', 'nbf'):
+            if not isinstance(payload.get(claim, 0), (int, float)):
+                return False
+        if 'exp' in payload and payload['exp'] < now - leeway:
+            return False
+        if 'nbf' in payload and payload['nbf'] > now + leeway:
+            return False
+        if self.audience is not None:
+            audience = payload.get('aud')
+            if isinstance(audience, str):
+                audience = [audience]
+            if self.audience not in (audience or ()):
+                return False
+        return self.issuer is None or payload.get('iss') == self.issuer
+
+
+@lru_cache(maxsize=None)
+def get_token_backend(path=None):
+    return import_string(path or settings.JWT_TOKEN_BACKEND)(
+        api_settings.ALGORITHM,
+        api_settings.SIGNING_KEY,
+        api_settings.VERIFYING_KEY,
+        api_settings.AUDIENCE,
+        api_settings.ISSUER,
+        api_settings.JWK_URL,
+        api_settings.LEEWAY,
+        api_settings.JSON_ENCODER,
+    )
+
+
+class AccessToken(tokens.AccessToken):
+
+    @property
+    def token_backend(self):
+        return get_token_backend()
@@ -1,6 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserViewSet, SignUpView, ObtainTokenView
+from .views import (
+    UserViewSet,
+    SignUpView,
+    ObtainTokenView,
+    SearchView,
+    ExportView,
+)
 from .views import (
     CategoryViewSet,
     GenreViewSet,
@@ -50,4 +56,6 @@ auth_patterns = [
 urlpatterns = [
     path("", include(v_1_router.urls)),
     path("auth/", include(auth_patterns)),
+    path("search/", SearchView.as_view(), name="search"),
+    path("export/<str:table>/", ExportView.as_view(), name="export"),
 ]
@@ -1,18 +1,43 @@
-from rest_framework import status, viewsets, filters
+from rest_framework import generics, status, viewsets, filters
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.settings import api_settings
 
-from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
-from django.core.mail import send_mail
-
-
-from .mixins import ListCreateDestroyViewSet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+from .authentication import get_full_user, get_token_for_user
+from .bulk import (
+    after_bulk_write,
+    build_titles,
+    bulk_create_with_pks,
+    bulk_error,
+    bulk_response,
+    get_title_result,
+    resolve_authors,
+    validate_bulk_items,
+    write_titles,
+)
+from .cache import (
+    REVIEW_COMMENTS_SCOPE,
+    TITLE_REVIEWS_SCOPE,
+    TITLE_SCOPE,
+    USERNAMES_SCOPE,
+)
+from .mixins import (
+    CachedListMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    ListCreateDestroyViewSet,
+)
 from .filters import TitleFilter
 from .permissions import (
     IsAdminOrReadOnly,
@@ -20,15 +45,34 @@ from .permissions import (
     IsAuthenticatedOrReadOnly,
     IsAuthorOrModeratorOrAdmin,
 )
-from reviews.models import Category, Genre, Title, Review
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Title,
+    Review,
+)
+from reviews.export import (
+    EXPORT_FORMATS,
+    EXPORT_TABLES,
+    get_export_filename,
+    iter_export,
+)
+from reviews.search import SEARCH_KINDS, get_search_backend
 from users.models import CustomUser
+from users.confirmation import set_confirmation_code
+from users.outbox import enqueue_email
 from .serializers import (
     CategorySerializer,
     GenreSerializer,
     TitleSerializer,
     TitleCreateSerializer,
+    TitleBulkSerializer,
     CommentSerializer,
+    CommentBulkSerializer,
     ReviewSerializer,
+    ReviewBulkSerializer,
     UserSerializer,
     ObtainTokenSerializer,
     SignUpSerializer
@@ -36,18 +80,20 @@ from .serializers import (
 
 
 class ObtainTokenView(APIView):
+    throttle_scope = 'token'
+
     def post(self, request):
         serializer = ObtainTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        user = CustomUser.objects.get(
-            username=serializer.validated_data['username'])
-        refresh = RefreshToken.for_user(user)
-        access_token = str(refresh.access_token)
+        user = serializer.validated_data['user']
+        access_token = str(get_token_for_user(user))
         return Response({"token": access_token}, status=status.HTTP_200_OK)
 
 
 class SignUpView(APIView):
+    throttle_scope = 'signup'
+
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -55,25 +101,29 @@ class SignUpView(APIView):
         email = serializer.validated_data.get("email")
         username = serializer.validated_data.get("username")
 
-        user, created = CustomUser.objects.get_or_create(
-            email=email,
-            defaults={
-                "username": username,
-                "role": CustomUser.USER,
-            },
-        )
-
-        token = default_token_generator.make_token(user)
-
-        if not created:
-            user.save()
-
-        send_mail(
+        user = serializer.validated_data["user"]
+        if user is None:
+            user = CustomUser(
+                username=username, email=email, role=CustomUser.USER
+            )
+            code = set_confirmation_code(user)
+            try:
+                user.save()
+            except IntegrityError:
+                # Параллельная регистрация заняла username после проверки
+                raise ValidationError(
+                    {"username": ["Username already exists."]}
+                )
+        else:
+            code = set_confirmation_code(user)
+            user.save(update_fields=(
+                "confirmation_code", "confirmation_code_expires_at"
+            ))
+
+        enqueue_email(
             "Подтверждение регистрации",
-            f"Ваш код подтверждения: {token}",
-            "noreply@yamdb.com",
-            [user.email],
-            fail_silently=False,
+            f"Ваш код подтверждения: {code}",
+            user.email,
         )
 
         data = {"email": email, "username": username}
@@ -100,12 +150,13 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        user = get_full_user(request.user)
         if request.method == "GET":
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
             return Response(serializer.data)
         elif request.method == "PATCH":
             serializer = self.get_serializer(
-                request.user, data=request.data, partial=True
+                user, data=request.data, partial=True
             )
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -130,64 +181,327 @@ class UserViewSet(viewsets.ModelViewSet):
 class CategoryViewSet(ListCreateDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
 
 
 class GenreViewSet(ListCreateDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(rating=Avg("reviews__score")).order_by(
-        "rating"
-    )
+class TitleViewSet(
+    ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet
+):
+    queryset = Title.objects.select_related("category").prefetch_related(
+        "genre"
+    ).order_by("rating")
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = TitleFilter
     http_method_names = ['get', 'post', 'patch', 'delete']
+    cache_models = (Title, Category, Genre, GenreTitle, Review)
+    cache_anonymous_only = True
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
             return TitleSerializer
         return TitleCreateSerializer
 
+    def get_validator_scopes(self):
+        if self.action == "retrieve":
+            return [
+                TITLE_SCOPE.format(self.kwargs["pk"]),
+                Category._meta.db_table,
+                Genre._meta.db_table,
+            ]
+        return [model._meta.db_table for model in self.cache_models]
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_write(self, request):
+        results, valid = validate_bulk_items(
+            request,
+            lambda data: TitleBulkSerializer(
+                data=data, partial=isinstance(data, dict) and 'id' in data
+            ),
+        )
+        titles, title_genres = build_titles(results, valid)
+        created = write_titles(titles, title_genres)
+        for index, title in titles.items():
+            genres = title_genres.get(index)
+            if genres is None:
+                genres = title.genre.all() if index not in created else []
+            results[index] = get_title_result(
+                title, genres, index in created
+            )
+        return bulk_response(results)
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(
+    ConditionalGetMixin, KeysetPaginationMixin, viewsets.ModelViewSet
+):
     serializer_class = ReviewSerializer
     http_method_names = ['get', 'post', 'patch', 'delete']
+    throttle_scope = 'reviews'
     permission_classes = [
         IsAuthenticatedOrReadOnly,
         IsAuthorOrModeratorOrAdmin
     ]
 
+    def get_title(self):
+        # Загружается один раз за запрос
+        if not hasattr(self, "_title"):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get("title_id")
+            )
+        return self._title
+
     def get_queryset(self):
-        title_id = int(self.kwargs.get("title_id"))
-        title = get_object_or_404(Title, pk=title_id)
-        return title.reviews.all().order_by('pub_date')
+        if self.action == "list":
+            # Список отдаёт 404 для несуществующего произведения
+            reviews = self.get_title().reviews
+        else:
+            reviews = Review.objects.filter(
+                title_id=self.kwargs.get("title_id")
+            )
+        return reviews.select_related('author').order_by('pub_date')
+
+    def get_pagination_count(self):
+        return self.get_title().rating_count
+
+    def get_validator_scopes(self):
+        return [
+            TITLE_REVIEWS_SCOPE.format(self.kwargs.get("title_id")),
+            USERNAMES_SCOPE,
+        ]
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get("title_id")
-        get_object_or_404(Title, id=title_id)
-        serializer.save(author=self.request.user, title_id=title_id)
+        # Повторный отзыв отклоняет ограничение unique_title_author, без
+        # отдельной проверки и гонки между проверкой и вставкой
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    author=self.request.user, title=self.get_title()
+                )
+        except IntegrityError:
+            # Другие ошибки ограничений, например внешнего ключа, которые
+            # SQLite проверяет при фиксации, не выдаём за повторный отзыв
+            if not self.get_title().reviews.filter(
+                author=self.request.user
+            ).exists():
+                raise
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Отзыв уже оставлен."]}
+            )
 
+    def reject_taken(self, title, reviews, results):
+        # Отклоняет отзывы авторов, уже оценивших произведение,
+        # и возвращает их число
+        taken = set(title.reviews.filter(
+            author__in=[review.author for review in reviews.values()]
+        ).values_list('author_id', flat=True))
+        rejected = 0
+        for index, review in list(reviews.items()):
+            if review.author_id in taken:
+                results[index] = bulk_error({
+                    api_settings.NON_FIELD_ERRORS_KEY: ["Отзыв уже оставлен."]
+                })
+                del reviews[index]
+                rejected += 1
+            taken.add(review.author_id)
+        return rejected
 
-class CommentViewSet(viewsets.ModelViewSet):
+    @action(
+        detail=False, methods=['post'], url_path='bulk',
+        throttle_scope='reviews_bulk',
+    )
+    def bulk_create(self, request, title_id):
+        title = self.get_title()
+        results, valid = validate_bulk_items(request, ReviewBulkSerializer)
+        reviews = {
+            index: Review(title=title, **data)
+            for index, data in resolve_authors(request, results, valid)
+        }
+        self.reject_taken(title, reviews, results)
+        while True:
+            try:
+                with transaction.atomic():
+                    bulk_create_with_pks(
+                        Review, list(reviews.values()), ('author_id',),
+                        title.reviews.filter(author__in=[
+                            review.author for review in reviews.values()
+                        ]),
+                    )
+                    # bulk_create обходит Review.save, рейтинг обновляем сами
+                    Title.objects.filter(pk=title.pk).update_rating(
+                        sum(review.score for review in reviews.values()),
+                        len(reviews),
+                    )
+                break
+            except IntegrityError:
+                # Параллельный запрос оставил отзыв одного из авторов
+                # после проверки: отклоняем такие отзывы и повторяем
+                if not self.reject_taken(title, reviews, results):
+                    raise
+        after_bulk_write(list(reviews.values()))
+        for index, review in reviews.items():
+            results[index] = {
+                'status': status.HTTP_201_CREATED,
+                'data': ReviewSerializer(review).data,
+            }
+        return bulk_response(results)
+
+
+class CommentViewSet(
+    ConditionalGetMixin, KeysetPaginationMixin, viewsets.ModelViewSet
+):
     serializer_class = CommentSerializer
     http_method_names = ['get', 'post', 'patch', 'delete']
+    throttle_scope = 'comments'
     permission_classes = [
         IsAuthenticatedOrReadOnly,
         IsAuthorOrModeratorOrAdmin
     ]
 
+    def get_review(self):
+        # Загружается один раз за запрос
+        if not hasattr(self, "_review"):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs.get("review_id"),
+                title_id=self.kwargs.get("title_id"),
+            )
+        return self._review
+
     def get_queryset(self):
-        review_id = self.kwargs.get("review_id")
-        title_id = self.kwargs.get("title_id")
-        review = get_object_or_404(Review, id=review_id, title_id=title_id)
-        return review.comments.all().order_by('pub_date')
+        if self.action == "list":
+            # Список отдаёт 404 для несуществующего отзыва
+            comments = self.get_review().comments
+        else:
+            comments = Comment.objects.filter(
+                review_id=self.kwargs.get("review_id"),
+                review__title_id=self.kwargs.get("title_id"),
+            )
+        return comments.select_related('author').order_by('pub_date')
+
+    def get_validator_scopes(self):
+        return [
+            REVIEW_COMMENTS_SCOPE.format(self.kwargs.get("review_id")),
+            USERNAMES_SCOPE,
+        ]
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get("review_id")
-        title_id = self.kwargs.get("title_id")
-        review = get_object_or_404(Review, id=review_id, title_id=title_id)
-        user = self.request.user
-        serializer.save(author=user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
+
+    @action(
+        detail=False, methods=['post'], url_path='bulk',
+        throttle_scope='comments_bulk',
+    )
+    def bulk_create(self, request, title_id, review_id):
+        review = self.get_review()
+        results, valid = validate_bulk_items(request, CommentBulkSerializer)
+        valid = resolve_authors(request, results, valid)
+        comments = {
+            index: Comment(review=review, **data) for index, data in valid
+        }
+
+        started = timezone.now()
+        with transaction.atomic():
+            bulk_create_with_pks(
+                Comment, list(comments.values()),
+                ('author_id', 'pub_date', 'text'),
+                review.comments.filter(pub_date__gte=started),
+            )
+        after_bulk_write(list(comments.values()))
+        for index, comment in comments.items():
+            results[index] = {
+                'status': status.HTTP_201_CREATED,
+                'data': CommentSerializer(comment).data,
+            }
+        return bulk_response(results)
+
+
+class SearchView(generics.GenericAPIView):
+    pagination_class = PageNumberPagination
+    search_sources = {
+        "title": (
+            Title.objects.select_related("category").prefetch_related(
+                "genre"
+            ),
+            TitleSerializer,
+        ),
+        "review": (
+            Review.objects.select_related("author"),
+            ReviewSerializer,
+        ),
+        "comment": (
+            Comment.objects.select_related("author", "review"),
+            CommentSerializer,
+        ),
+    }
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            raise ValidationError({"q": "Обязательный параметр."})
+        kinds = request.query_params.get("type")
+        kinds = kinds.split(",") if kinds else None
+        if kinds and not set(kinds) <= SEARCH_KINDS.keys():
+            raise ValidationError(
+                {"type": f"Допустимые значения: {', '.join(SEARCH_KINDS)}."}
+            )
+
+        hits = self.paginate_queryset(
+            get_search_backend().search(query, kinds)
+        )
+        return self.get_paginated_response(self.serialize_hits(hits))
+
+    def serialize_hits(self, hits):
+        objects = {}
+        for kind, (queryset, _) in self.search_sources.items():
+            pks = [hit.object_id for hit in hits if hit.kind == kind]
+            if pks:
+                objects[kind] = queryset.in_bulk(pks)
+
+        results = []
+        for hit in hits:
+            instance = objects.get(hit.kind, {}).get(hit.object_id)
+            if instance is None:
+                continue
+            serializer_class = self.search_sources[hit.kind][1]
+            result = {"type": hit.kind}
+            if hit.kind == "review":
+                result["title_id"] = instance.title_id
+            elif hit.kind == "comment":
+                result["title_id"] = instance.review.title_id
+                result["review_id"] = instance.review_id
+            result["object"] = serializer_class(
+                instance, context=self.get_serializer_context()
+            ).data
+            results.append(result)
+        return results
+
+
+class ExportView(APIView):
+    permission_classes = [IsAdmin]
+    chunk_size = 2000
+
+    def get(self, request, table):
+        model = EXPORT_TABLES.get(table)
+        if model is None:
+            raise NotFound(f"Unknown table: {table}.")
+        export_format = request.query_params.get("output", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({
+                "output": f"Допустимые значения: {', '.join(EXPORT_FORMATS)}."
+            })
+
+        response = StreamingHttpResponse(
+            iter_export(model, export_format, self.chunk_size),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        filename = get_export_filename(table, export_format)
+        response["Content-Disposition"] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
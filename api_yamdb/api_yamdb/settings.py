@@ -71,6 +71,15 @@ DATABASES = {
 }
 
 
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -107,13 +116,63 @@ AUTHENTICATION_BACKENDS = (
 
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CachedCountPagination',
     'PAGE_SIZE': 10,
+    # Tokens from ObtainTokenView carry the user's role, so authenticated
+    # requests need no user query; see api.authentication
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
+    # Anonymous requests are throttled per REMOTE_ADDR; behind N trusted
+    # proxies set this to N so that X-Forwarded-For cannot be spoofed
+    'NUM_PROXIES': 0,
+    # Views with a throttle_scope get a token bucket per user or IP;
+    # see api.throttling
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.ScopedTokenBucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': '20/hour',
+        'token': '30/hour',
+        'reviews': '30/min',
+        'comments': '60/min',
+        # Bulk actions cost a token per item, so their buckets must hold
+        # BULK_CREATE_MAX_ITEMS
+        'reviews_bulk': '1000/hour',
+        'comments_bulk': '1000/hour',
+    },
 }
 
+# Full-text search over titles, reviews and comments
+SEARCH_BACKEND = 'reviews.search.SQLiteFTS5Backend'
+
+# Lifetime of the write versions of api.cache; also bounds how long a
+# process with its own cache can miss writes made by other processes
+CACHE_VERSION_TIMEOUT = 60
+
+# Paginated list counts are served from the cache above this many rows
+PAGINATION_EXACT_COUNT_THRESHOLD = 1000
+PAGINATION_COUNT_CACHE_TIMEOUT = 60 * 5
+
+# Cached catalogue list responses also expire on any write to their models
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+# Upper limit on the number of objects in one bulk create request
+BULK_CREATE_MAX_ITEMS = 1000
+
+# Per-process cache of users loaded by api.authentication.CachedJWTAuthentication;
+# also the lifetime of cached token versions, which bounds how long a
+# revoked token passes on processes that did not make the change
+AUTH_USER_CACHE_SIZE = 10000
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Per-process cache of throttle keys whose token bucket is empty
+THROTTLE_LOCAL_CACHE_SIZE = 10000
+THROTTLE_LOCAL_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Signs and verifies the tokens of api.tokens.AccessToken
+JWT_TOKEN_BACKEND = 'api.tokens.HMACTokenBackend'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'ROTATE_REFRESH_TOKENS': False,
@@ -123,7 +182,7 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
-    'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'AUTH_TOKEN_CLASSES': ('api.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
@@ -137,3 +196,16 @@ AUTH_USER_MODEL = 'users.CustomUser'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = str(BASE_DIR / "sent_emails")
+DEFAULT_FROM_EMAIL = 'noreply@yamdb.com'
+
+# Lifetime in seconds of the codes sent on signup; a code works once and
+# is revoked after CONFIRMATION_CODE_MAX_ATTEMPTS wrong guesses
+CONFIRMATION_CODE_TIMEOUT = 60 * 60
+CONFIRMATION_CODE_MAX_ATTEMPTS = 5
+
+# Queued emails are sent by `manage.py send_outbox`; a failed email is
+# retried after EMAIL_OUTBOX_RETRY_DELAY seconds, doubled on every attempt
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+# Emails sent per second by one worker, 0 for no limit
+EMAIL_OUTBOX_RATE_LIMIT = 0
@@ -0,0 +1,74 @@
+import csv
+import json
+import os
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from reviews.management.commands.import_csv import TABLES_DICT
+from reviews.models import Title, CustomUser
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Таблицы по имени файла без расширения: users, titles, review...
+EXPORT_TABLES = {
+    os.path.splitext(filename)[0]: model
+    for model, filename in TABLES_DICT.items()
+}
+
+# Не выгружаются секреты пользователей и производные значения,
+# которые пересчитываются после загрузки
+EXCLUDED_FIELDS = {
+    CustomUser: {'password', 'confirmation_code'},
+    Title: {'rating_sum', 'rating_count', 'rating'},
+}
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def get_export_fields(model):
+    excluded = EXCLUDED_FIELDS.get(model, set())
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if field.name not in excluded
+    ]
+
+
+def get_export_filename(table, export_format):
+    return f'{table}.{export_format}'
+
+
+def iter_export(model, export_format='csv', chunk_size=2000):
+    # Таблица читается серверным курсором и отдаётся частями
+    fields = get_export_fields(model)
+    rows = model.objects.order_by('pk').values_list(*fields).iterator(
+        chunk_size=chunk_size
+    )
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        encode = writer.writerow
+    else:
+        def encode(row):
+            return json.dumps(
+                dict(zip(fields, row)),
+                ensure_ascii=False,
+                cls=DjangoJSONEncoder,
+            ) + '\n'
+
+    chunk = []
+    for row in rows:
+        chunk.append(encode([
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row
+        ]))
+        if len(chunk) == chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
@@ -0,0 +1,55 @@
+import os
+
+from django.core.management import BaseCommand, CommandError
+
+from reviews.export import (
+    EXPORT_FORMATS, EXPORT_TABLES, get_export_filename, iter_export
+)
+
+
+class Command(BaseCommand):
+    # Выгрузка данных
+    help = 'Export tables to csv or NDJSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables', nargs='*',
+            help='Tables to export, all by default: ' + ', '.join(
+                EXPORT_TABLES
+            ),
+        )
+        parser.add_argument(
+            '--format', dest='export_format', default='csv',
+            choices=EXPORT_FORMATS,
+        )
+        parser.add_argument(
+            '--output-dir', default='.',
+            help='Directory the files are written to',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of rows fetched from the database at a time',
+        )
+
+    def handle(self, *args, **options):
+        tables = options['tables'] or list(EXPORT_TABLES)
+        unknown = set(tables) - EXPORT_TABLES.keys()
+        if unknown:
+            raise CommandError(f'Unknown tables: {", ".join(unknown)}')
+        os.makedirs(options['output_dir'], exist_ok=True)
+
+        for table in tables:
+            path = os.path.join(
+                options['output_dir'],
+                get_export_filename(table, options['export_format']),
+            )
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                for chunk in iter_export(
+                        EXPORT_TABLES[table],
+                        options['export_format'],
+                        options['chunk_size'],
+                ):
+                    file.write(chunk)
+            self.stdout.write(f'{table}: {path}')
+
+        self.stdout.write(self.style.SUCCESS('Successfully export_csv'))
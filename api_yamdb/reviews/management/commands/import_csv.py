@@ -1,10 +1,21 @@
 import csv
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 from django.conf import settings
 from django.core.management import BaseCommand
+from django.db import connection, transaction
 
+from api.cache import USERNAMES_SCOPE, bump_versions
+from api.signals import get_instance_scopes
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, CustomUser)
+from reviews.search import get_search_backend
 
 # Словарь Модель+Файл.csv в БД
 TABLES_DICT = {
@@ -17,18 +28,256 @@ TABLES_DICT = {
     GenreTitle: 'genre_title.csv',
 }
 
+# Этапы загрузки: таблицы одного этапа не ссылаются друг на друга
+# и могут загружаться параллельно
+IMPORT_STAGES = (
+    (CustomUser, Category, Genre),
+    (Title,),
+    (Review, GenreTitle),
+    (Comment,),
+)
+
+CHECKPOINT_FILE = '.import_checkpoint.json'
+
+
+def read_lines(csv_file):
+    # readline() вместо итерации по файлу, иначе tell() недоступен
+    while True:
+        line = csv_file.readline()
+        if not line:
+            return
+        yield line
+
+
+def parse_row(fieldnames, fields, data):
+    # Пустая строка в csv означает NULL для полей, не допускающих ''
+    return {
+        name: (
+            field.to_python(data[name]) if data[name] != ''
+            else '' if field.empty_strings_allowed else None
+        )
+        for name, field in zip(fieldnames, fields)
+    }
+
+
+def read_batches(reader, batch_size):
+    while True:
+        batch = list(islice(reader, batch_size))
+        if not batch:
+            return
+        yield batch
+
 
 class Command(BaseCommand):
     # Загрузка данных
     help = 'Load data from csv files'
 
-    def handle(self, *args, **kwargs):
-        for model, csv_file1 in TABLES_DICT.items():
-            with open(
-                    f'{settings.BASE_DIR}/static/data/{csv_file1}',
-                    'r', encoding='utf-8'
-            ) as csv_file:
-                reader = csv.DictReader(csv_file)
-                model.objects.bulk_create(model(**data) for data in reader)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir', default=f'{settings.BASE_DIR}/static/data',
+            help='Directory with the csv files',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows read and inserted at a time',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of tables of one stage loaded concurrently',
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help=(
+                'Insert new rows and update existing ones by id, commit '
+                'every batch and resume from the last checkpoint'
+            ),
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=f'Checkpoint file, {CHECKPOINT_FILE} in --data-dir if unset',
+        )
+
+    def handle(self, *args, **options):
+        self.data_dir = options['data_dir']
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        self.upsert = options['upsert']
+        self.checkpoint_path = options['checkpoint'] or os.path.join(
+            self.data_dir, CHECKPOINT_FILE
+        )
+        self.checkpoints = {}
+        if self.upsert and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding='utf-8') as file:
+                self.checkpoints = json.load(file)
+        self.lock = threading.Lock()
+        # Версии кэша, которые сбросили бы сигналы пропущенных save()
+        self.scopes = set()
+
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            # SQLite допускает только одного писателя одновременно
+            self.stdout.write(self.style.WARNING(
+                'SQLite allows a single writer, loading tables serially'
+            ))
+            workers = 1
+
+        if workers > 1:
+            with ThreadPoolExecutor(workers) as executor:
+                for stage in IMPORT_STAGES:
+                    # list() дожидается завершения этапа и пробрасывает ошибки
+                    list(executor.map(self.load_table_in_thread, stage))
+        else:
+            for stage in IMPORT_STAGES:
+                for model in stage:
+                    self.load_table(model)
+
+        # bulk_create обходит Review.save и сигналы, поэтому пересчитываем
+        # рейтинги и поисковый индекс и сбрасываем версии кэша
+        Title.objects.rebuild_ratings()
+        get_search_backend().rebuild()
+        bump_versions(self.scopes)
+
+        # Импорт завершён, следующий запуск начнётся с начала файлов
+        if self.upsert and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
 
         self.stdout.write(self.style.SUCCESS('Successfully import_csv'))
+
+    def load_table_in_thread(self, model):
+        try:
+            return self.load_table(model)
+        finally:
+            connection.close()
+
+    def load_table(self, model):
+        # Обычная загрузка идёт одной транзакцией на таблицу, upsert
+        # фиксирует каждую пачку и запоминает позицию в файле
+        filename = TABLES_DICT[model]
+        checkpoint = self.checkpoints.get(filename, {})
+        loaded_before = checkpoint.get('rows', 0)
+        stats = Counter(skipped=loaded_before)
+        started = time.monotonic()
+        if checkpoint.get('done'):
+            self.report(model, stats, started, done=True)
+            return stats
+
+        with open(
+                os.path.join(self.data_dir, filename),
+                'r', encoding='utf-8', newline=''
+        ) as csv_file:
+            fieldnames = next(csv.reader([csv_file.readline()]))
+            if checkpoint:
+                csv_file.seek(checkpoint['offset'])
+            reader = csv.DictReader(
+                read_lines(csv_file), fieldnames=fieldnames
+            )
+            if self.upsert:
+                for batch in read_batches(reader, self.batch_size):
+                    with transaction.atomic():
+                        self.upsert_batch(model, fieldnames, batch, stats)
+                    self.save_checkpoint(
+                        filename,
+                        offset=csv_file.tell(),
+                        rows=loaded_before + stats['rows'],
+                    )
+                    self.report(model, stats, started)
+                self.save_checkpoint(
+                    filename, done=True, rows=loaded_before + stats['rows']
+                )
+            else:
+                fields = [model._meta.get_field(name) for name in fieldnames]
+                with transaction.atomic():
+                    for batch in read_batches(reader, self.batch_size):
+                        objs = self.insert_rows(model, fields, [
+                            parse_row(fieldnames, fields, data)
+                            for data in batch
+                        ])
+                        self.add_scopes(model, objs)
+                        stats['inserted'] += len(batch)
+                        stats['rows'] += len(batch)
+                        self.report(model, stats, started)
+
+        self.report(model, stats, started, done=True)
+        return stats
+
+    def upsert_batch(self, model, fieldnames, batch, stats):
+        # Новые строки вставляются, изменённые обновляются, прочие пропускаются
+        fields = [model._meta.get_field(name) for name in fieldnames]
+        rows = {}
+        for data in batch:
+            values = parse_row(fieldnames, fields, data)
+            rows[values['id']] = values
+        existing = {
+            values['id']: values
+            for values in model.objects.filter(pk__in=rows).values(
+                *fieldnames
+            )
+        }
+
+        new, changed = [], []
+        for pk, values in rows.items():
+            if pk not in existing:
+                new.append(values)
+            elif existing[pk] != values:
+                changed.append(model(**values))
+        new = self.insert_rows(model, fields, new)
+        if changed:
+            model.objects.bulk_update(changed, [
+                field.name for field in fields if not field.primary_key
+            ])
+
+        self.add_scopes(model, new + changed)
+
+        stats['inserted'] += len(new)
+        stats['updated'] += len(changed)
+        stats['skipped'] += len(batch) - len(new) - len(changed)
+        stats['rows'] += len(batch)
+
+    def insert_rows(self, model, fields, rows):
+        objs = model.objects.bulk_create(model(**values) for values in rows)
+        # bulk_create подставляет текущее время в поля auto_now_add,
+        # возвращаем значения из файла
+        auto_now_add = [
+            field.name for field in fields
+            if getattr(field, 'auto_now_add', False)
+        ]
+        if objs and auto_now_add:
+            objs = [model(**values) for values in rows]
+            model.objects.bulk_update(objs, auto_now_add)
+        return objs
+
+    def add_scopes(self, model, objs):
+        scopes = {model._meta.db_table}
+        if model is CustomUser:
+            scopes.add(USERNAMES_SCOPE)
+        for obj in objs:
+            scopes.update(get_instance_scopes(obj))
+        with self.lock:
+            self.scopes |= scopes
+
+    def save_checkpoint(self, filename, **checkpoint):
+        with self.lock:
+            self.checkpoints[filename] = checkpoint
+            temporary_path = f'{self.checkpoint_path}.tmp'
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                json.dump(self.checkpoints, file)
+            os.replace(temporary_path, self.checkpoint_path)
+
+    def report(self, model, stats, started, done=False):
+        if not done and self.verbosity < 2:
+            return
+        elapsed = max(time.monotonic() - started, 1e-6)
+        message = (
+            f'{model._meta.db_table}: {stats["rows"]} rows, '
+            f'{stats["rows"] / elapsed:.0f} rows/s'
+        )
+        with self.lock:
+            if done:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{message}, {elapsed:.2f}s, '
+                    f'inserted {stats["inserted"]}, '
+                    f'updated {stats["updated"]}, '
+                    f'skipped {stats["skipped"]}'
+                ))
+            else:
+                self.stdout.write(message)
@@ -0,0 +1,14 @@
+from django.core.management import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    # Пересчёт сохранённых рейтингов произведений по отзывам
+    help = 'Rebuild stored title ratings from reviews'
+
+    def handle(self, *args, **kwargs):
+        updated = Title.objects.rebuild_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {updated} ratings')
+        )
@@ -0,0 +1,20 @@
+from django.core.management import BaseCommand
+
+from reviews.search import get_search_backend
+
+
+class Command(BaseCommand):
+    # Полная перестройка полнотекстового индекса
+    help = 'Rebuild the full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of objects read and indexed at a time',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.setup()
+        backend.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt index'))
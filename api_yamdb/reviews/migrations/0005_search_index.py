@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS reviews_search_index '
+        'USING fts5(name, body, '
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        'INSERT INTO reviews_search_index (rowid, name, body) '
+        'SELECT id * 4 + 1, name, description FROM reviews_title'
+    )
+    schema_editor.execute(
+        'INSERT INTO reviews_search_index (rowid, name, body) '
+        "SELECT id * 4 + 2, '', text FROM reviews_review"
+    )
+    schema_editor.execute(
+        'INSERT INTO reviews_search_index (rowid, name, body) '
+        "SELECT id * 4 + 3, '', text FROM reviews_comment"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS reviews_search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_slug_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
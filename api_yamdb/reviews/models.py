@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Avg, Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, Lower, NullIf
+
 from users.models import CustomUser
 
 CHOICES_SCORE = [(i, i) for i in range(1, 11)]
@@ -9,6 +12,9 @@ class Category(models.Model):
     slug = models.SlugField(unique=True, verbose_name="Slug")
 
     class Meta:
+        indexes = (
+            models.Index(Lower("slug"), name="category_slug_lower_idx"),
+        )
         verbose_name = "category"
         verbose_name_plural = "categories"
         ordering = ['name']
@@ -22,6 +28,9 @@ class Genre(models.Model):
     slug = models.SlugField(unique=True, verbose_name="Slug")
 
     class Meta:
+        indexes = (
+            models.Index(Lower("slug"), name="genre_slug_lower_idx"),
+        )
         verbose_name = "genre"
         verbose_name_plural = "genres"
         ordering = ['name']
@@ -30,6 +39,35 @@ class Genre(models.Model):
         return f"{self.name}"
 
 
+class TitleQuerySet(models.QuerySet):
+    def update_rating(self, score_delta, count_delta):
+        # Сдвигает сохранённые суммы оценок на заданные величины
+        rating_sum = F("rating_sum") + score_delta
+        rating_count = F("rating_count") + count_delta
+        return self.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+        )
+
+    def rebuild_ratings(self):
+        # Пересчитывает суммы оценок по отзывам
+        reviews = Review.objects.filter(
+            title=OuterRef("pk")
+        ).order_by().values("title")
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum("score")).values("total")),
+                0,
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count("id")).values("total")),
+                0,
+            ),
+            rating=Subquery(reviews.annotate(avg=Avg("score")).values("avg")),
+        )
+
+
 class Title(models.Model):
     name = models.CharField(max_length=256, verbose_name="Name")
     year = models.IntegerField(verbose_name="Year")
@@ -44,8 +82,30 @@ class Title(models.Model):
         null=True,
         verbose_name="Category",
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Sum of review scores"
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Number of reviews"
+    )
+    rating = models.FloatField(
+        null=True,
+        editable=False,
+        verbose_name="Rating"
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
+        indexes = (
+            models.Index(Lower("name"), name="title_name_lower_idx"),
+            models.Index(fields=("year",), name="title_year_idx"),
+            models.Index(fields=("rating",), name="title_rating_idx"),
+        )
         verbose_name = "title"
         verbose_name_plural = "titles"
 
@@ -95,12 +155,32 @@ class Review(models.Model):
                 name="unique_title_author",
             ),
         )
+        indexes = (
+            models.Index(
+                fields=("title", "pub_date", "id"),
+                name="review_title_pub_date_idx",
+            ),
+        )
         verbose_name = "review"
         verbose_name_plural = "reviews"
 
     def __str__(self):
         return f"{self.title} {self.text} {self.score}"
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        titles = Title.objects.filter(pk=self.title_id)
+        with transaction.atomic():
+            if self._state.adding:
+                super().save(*args, **kwargs)
+                titles.update_rating(self.score, 1)
+            elif update_fields is None or "score" in update_fields:
+                old_score = Review.objects.filter(pk=self.pk).values("score")
+                titles.update_rating(self.score - Subquery(old_score), 0)
+                super().save(*args, **kwargs)
+            else:
+                super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     author = models.ForeignKey(
@@ -120,6 +200,12 @@ class Comment(models.Model):
     )
 
     class Meta:
+        indexes = (
+            models.Index(
+                fields=("review", "pub_date", "id"),
+                name="comment_review_pub_date_idx",
+            ),
+        )
         verbose_name = "comment"
         verbose_name_plural = "comments"
 
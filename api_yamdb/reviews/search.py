@@ -0,0 +1,255 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Comment, Review, Title
+
+# Коды типов документов, зашитые в rowid индекса: rowid = pk * 4 + код
+SEARCH_KINDS = {
+    'title': 1,
+    'review': 2,
+    'comment': 3,
+}
+SEARCH_MODELS = {
+    'title': Title,
+    'review': Review,
+    'comment': Comment,
+}
+KIND_BASE = 4
+
+SearchHit = namedtuple('SearchHit', ('kind', 'object_id'))
+
+
+def get_kind(instance):
+    for kind, model in SEARCH_MODELS.items():
+        if isinstance(instance, model):
+            return kind
+    return None
+
+
+def get_document(instance):
+    if isinstance(instance, Title):
+        return instance.name, instance.description
+    return '', instance.text
+
+
+class BaseSearchBackend:
+    # search() возвращает ленивый объект с count() и срезами,
+    # его можно передать пагинатору
+
+    def setup(self):
+        pass
+
+    def index(self, instances):
+        raise NotImplementedError
+
+    def remove(self, instances):
+        raise NotImplementedError
+
+    def search(self, query, kinds=None):
+        raise NotImplementedError
+
+    def rebuild(self, chunk_size=2000):
+        self.clear()
+        for model in SEARCH_MODELS.values():
+            batch = []
+            for instance in model.objects.iterator(chunk_size=chunk_size):
+                batch.append(instance)
+                if len(batch) == chunk_size:
+                    self.index(batch)
+                    batch = []
+            self.index(batch)
+
+    def clear(self):
+        pass
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    # Запасной вариант для небольших баз без полнотекстового индекса:
+    # таблицы сканируются через icontains, результаты не ранжируются
+    fields = {
+        'title': ('name', 'description'),
+        'review': ('text',),
+        'comment': ('text',),
+    }
+
+    def index(self, instances):
+        pass
+
+    def remove(self, instances):
+        pass
+
+    def search(self, query, kinds=None):
+        return DatabaseSearchResults(self, query, kinds or list(SEARCH_KINDS))
+
+    def get_querysets(self, query, kinds):
+        terms = re.findall(r'\w+', query)
+        for kind in kinds:
+            condition = Q()
+            for term in terms:
+                term_condition = Q()
+                for field in self.fields[kind]:
+                    term_condition |= Q(**{f'{field}__icontains': term})
+                condition &= term_condition
+            yield kind, SEARCH_MODELS[kind].objects.filter(
+                condition
+            ).order_by('pk').values_list('pk', flat=True)
+
+
+class DatabaseSearchResults:
+    def __init__(self, backend, query, kinds):
+        self.querysets = list(backend.get_querysets(query, kinds))
+        self.counts = None
+
+    def get_counts(self):
+        if self.counts is None:
+            self.counts = [queryset.count() for _, queryset in self.querysets]
+        return self.counts
+
+    def count(self):
+        return sum(self.get_counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError('Search results support only plain slices.')
+        start = item.start or 0
+        remaining = None if item.stop is None else max(item.stop - start, 0)
+        hits = []
+        # Срез страницы выполняется в SQL по каждой таблице по очереди
+        for (kind, queryset), count in zip(self.querysets, self.get_counts()):
+            if remaining == 0:
+                break
+            if start >= count:
+                start -= count
+                continue
+            stop = None if remaining is None else start + remaining
+            pks = list(queryset[start:stop])
+            hits.extend(SearchHit(kind, pk) for pk in pks)
+            if remaining is not None:
+                remaining -= len(pks)
+            start = 0
+        return hits
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    # Индекс FTS5: rowid кодирует тип и pk объекта, ранжирование BM25
+    table = 'reviews_search_index'
+    name_weight = 10.0
+    body_weight = 1.0
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                'USING fts5(name, body, '
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def index(self, instances):
+        rows = []
+        for instance in instances:
+            name, body = get_document(instance)
+            rows.append((self.get_rowid(instance), name, body))
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(rowid,) for rowid, _, _ in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, name, body) '
+                'VALUES (%s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, instances):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(self.get_rowid(instance),) for instance in instances],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search(self, query, kinds=None):
+        return SQLiteFTS5Results(self, query, kinds)
+
+    def get_rowid(self, instance):
+        return instance.pk * KIND_BASE + SEARCH_KINDS[get_kind(instance)]
+
+
+class SQLiteFTS5Results:
+    def __init__(self, backend, query, kinds):
+        self.backend = backend
+        # Каждое слово запроса ищется как префикс, операторы FTS5 экранируются
+        self.match = ' '.join(
+            '"{}"*'.format(term) for term in re.findall(r'\w+', query)
+        )
+        self.kinds = kinds
+
+    def get_where(self):
+        where = f'{self.backend.table} MATCH %s'
+        params = [self.match]
+        if self.kinds:
+            where += ' AND rowid %% {} IN ({})'.format(
+                KIND_BASE, ', '.join(['%s'] * len(self.kinds))
+            )
+            params.extend(SEARCH_KINDS[kind] for kind in self.kinds)
+        return where, params
+
+    def count(self):
+        if not self.match:
+            return 0
+        where, params = self.get_where()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {self.backend.table} WHERE {where}',
+                params,
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError('Search results support only plain slices.')
+        start = item.start or 0
+        limit = -1 if item.stop is None else max(item.stop - start, 0)
+        if not self.match or limit == 0:
+            return []
+        where, params = self.get_where()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.backend.table} WHERE {where} '
+                f'ORDER BY bm25({self.backend.table}, %s, %s), rowid '
+                'LIMIT %s OFFSET %s',
+                params + [
+                    self.backend.name_weight,
+                    self.backend.body_weight,
+                    limit,
+                    start,
+                ],
+            )
+            rowids = [row[0] for row in cursor.fetchall()]
+        kinds = {code: kind for kind, code in SEARCH_KINDS.items()}
+        return [
+            SearchHit(kinds[rowid % KIND_BASE], rowid // KIND_BASE)
+            for rowid in rowids
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_search_backend(path=None):
+    return import_string(path or settings.SEARCH_BACKEND)()
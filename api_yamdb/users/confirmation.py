@@ -0,0 +1,75 @@
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import CustomUser
+
+CODE_LENGTH = 6
+# Число неверных попыток ввода текущего кода пользователя
+FAILED_ATTEMPTS_KEY = 'confirmation_code_failures:{}'
+
+
+def hash_confirmation_code(username, code):
+    return salted_hmac(
+        'users.confirmation_code', f'{username}:{code}', algorithm='sha256'
+    ).hexdigest()
+
+
+def set_confirmation_code(user):
+    # В БД хранится только HMAC кода, сам код возвращается для письма
+    code = str(secrets.randbelow(10 ** CODE_LENGTH)).zfill(CODE_LENGTH)
+    user.confirmation_code = hash_confirmation_code(user.username, code)
+    user.confirmation_code_expires_at = timezone.now() + timedelta(
+        seconds=settings.CONFIRMATION_CODE_TIMEOUT
+    )
+    if user.pk is not None:
+        cache.delete(FAILED_ATTEMPTS_KEY.format(user.pk))
+    return code
+
+
+def check_confirmation_code(user, code):
+    return bool(
+        user.confirmation_code
+        and user.confirmation_code_expires_at
+        and user.confirmation_code_expires_at > timezone.now()
+        and constant_time_compare(
+            user.confirmation_code,
+            hash_confirmation_code(user.username, code),
+        )
+    )
+
+
+def use_confirmation_code(user, code):
+    # Код действует один раз и отзывается после
+    # CONFIRMATION_CODE_MAX_ATTEMPTS неверных попыток
+    if not check_confirmation_code(user, code):
+        if user.confirmation_code:
+            count_failed_attempt(user)
+        return False
+    return clear_confirmation_code(user)
+
+
+def count_failed_attempt(user):
+    key = FAILED_ATTEMPTS_KEY.format(user.pk)
+    cache.add(key, 0, timeout=settings.CONFIRMATION_CODE_TIMEOUT)
+    try:
+        failures = cache.incr(key)
+    except ValueError:
+        # Счётчик вытеснен из кэша между add() и incr()
+        failures = 1
+        cache.set(key, failures, timeout=settings.CONFIRMATION_CODE_TIMEOUT)
+    if failures >= settings.CONFIRMATION_CODE_MAX_ATTEMPTS:
+        clear_confirmation_code(user)
+
+
+def clear_confirmation_code(user):
+    # Условие на хэш кода не даёт двум запросам потратить один код
+    cleared = CustomUser.objects.filter(
+        pk=user.pk, confirmation_code=user.confirmation_code
+    ).update(confirmation_code=None, confirmation_code_expires_at=None)
+    user.confirmation_code = user.confirmation_code_expires_at = None
+    return bool(cleared)
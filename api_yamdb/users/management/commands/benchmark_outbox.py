@@ -0,0 +1,87 @@
+import tempfile
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from users.models import OutboxEmail
+from users.outbox import OutboxDispatcher
+
+BACKENDS = {
+    'locmem': 'django.core.mail.backends.locmem.EmailBackend',
+    'file': 'django.core.mail.backends.filebased.EmailBackend',
+}
+
+
+class Command(BaseCommand):
+    # Замер скорости отправки писем из очереди
+    help = (
+        'Compare sending outbox emails one connection per email with the '
+        'batched dispatcher; nothing is kept in the database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'backends', nargs='*',
+            help='Email backends to measure, all by default: ' + ', '.join(
+                BACKENDS
+            ),
+        )
+        parser.add_argument('--count', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        backends = options['backends'] or list(BACKENDS)
+        unknown = set(backends) - BACKENDS.keys()
+        if unknown:
+            raise CommandError(f'Unknown backends: {", ".join(unknown)}')
+        for name in backends:
+            with tempfile.TemporaryDirectory() as file_path:
+                backend_kwargs = {'backend': BACKENDS[name]}
+                if name == 'file':
+                    backend_kwargs['file_path'] = file_path
+                self.report(name, 'per email', options['count'], self.measure(
+                    self.send_one_by_one, options, backend_kwargs
+                ))
+                self.report(name, 'batched', options['count'], self.measure(
+                    self.send_batched, options, backend_kwargs
+                ))
+
+    def measure(self, send, options, backend_kwargs):
+        # Письма очереди существуют только внутри откатываемой транзакции
+        with transaction.atomic():
+            OutboxEmail.objects.bulk_create(
+                OutboxEmail(
+                    subject='Подтверждение регистрации',
+                    body='Ваш код подтверждения: 000000',
+                    from_email='noreply@yamdb.com',
+                    to=f'user{idx}@yamdb.fake',
+                )
+                for idx in range(options['count'])
+            )
+            started = time.perf_counter()
+            send(options, backend_kwargs)
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed
+
+    def send_one_by_one(self, options, backend_kwargs):
+        for email in OutboxEmail.objects.order_by('pk'):
+            EmailMessage(
+                email.subject, email.body, email.from_email, [email.to],
+                connection=get_connection(**backend_kwargs),
+            ).send()
+            email.attempts += 1
+            email.save(update_fields=('attempts',))
+
+    def send_batched(self, options, backend_kwargs):
+        OutboxDispatcher(
+            batch_size=options['batch_size'], rate_limit=0, **backend_kwargs
+        ).drain()
+
+    def report(self, backend, mode, count, elapsed):
+        self.stdout.write(
+            f'{backend:>6} {mode:>9}: {count} emails in {elapsed:.2f}s, '
+            f'{count / max(elapsed, 1e-6):.0f} emails/s'
+        )
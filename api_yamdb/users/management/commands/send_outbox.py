@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from users.outbox import OutboxDispatcher
+
+
+class Command(BaseCommand):
+    # Отправка писем из очереди
+    help = 'Send the emails queued in the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of emails claimed and sent over one connection',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int,
+            default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            help='Number of attempts after which an email is given up',
+        )
+        parser.add_argument(
+            '--rate-limit', type=float,
+            default=settings.EMAIL_OUTBOX_RATE_LIMIT,
+            help='Maximum number of emails sent per second, 0 for no limit',
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of exiting once it is empty',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds between polls in --loop mode',
+        )
+
+    def handle(self, *args, **options):
+        dispatcher = OutboxDispatcher(
+            batch_size=options['batch_size'],
+            max_attempts=options['max_attempts'],
+            rate_limit=options['rate_limit'],
+        )
+        while True:
+            sent, failed = dispatcher.drain()
+            if sent or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Sent {sent} emails, {failed} failed'
+                ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='confirmation_code_expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Confirmation Code expires at'),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='confirmation_code',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='Confirmation Code'),
+        ),
+    ]
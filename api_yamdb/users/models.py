@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class CustomUser(AbstractUser):
@@ -19,16 +20,29 @@ class CustomUser(AbstractUser):
         verbose_name="Role"
     )
     confirmation_code = models.CharField(
-        max_length=10,
+        max_length=64,
         blank=True,
         null=True,
         verbose_name="Confirmation Code"
     )
+    confirmation_code_expires_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Confirmation Code expires at"
+    )
     bio = models.TextField(
         blank=True,
         null=True,
         verbose_name="Bio"
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Token version"
+    )
+
+    # Поля, которые попадают в токен: их изменение отзывает выданные токены
+    TOKEN_CLAIM_FIELDS = ("username", "role", "is_superuser", "is_active")
 
     @property
     def is_admin(self):
@@ -44,3 +58,63 @@ class CustomUser(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._loaded_claims = user.get_token_claims()
+        return user
+
+    def get_token_claims(self):
+        return {
+            field: self.__dict__.get(field)
+            for field in self.TOKEN_CLAIM_FIELDS
+        }
+
+    def save(self, *args, **kwargs):
+        loaded_claims = getattr(self, "_loaded_claims", None)
+        if loaded_claims and loaded_claims != self.get_token_claims():
+            self.token_version += 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "token_version"}
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.get_token_claims()
+
+
+class OutboxEmail(models.Model):
+    subject = models.CharField(max_length=255, verbose_name="Subject")
+    body = models.TextField(verbose_name="Body")
+    from_email = models.CharField(max_length=254, verbose_name="From")
+    to = models.EmailField(verbose_name="To")
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Created at"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Delivery attempts"
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Next attempt at"
+    )
+    sent_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Sent at"
+    )
+    last_error = models.TextField(blank=True, verbose_name="Last error")
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=("sent_at", "next_attempt_at"),
+                name="outbox_pending_idx",
+            ),
+        )
+        verbose_name = "outbox email"
+        verbose_name_plural = "outbox emails"
+
+    def __str__(self):
+        return f"{self.to} {self.subject}"
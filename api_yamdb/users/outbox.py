@@ -0,0 +1,118 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    # Письмо отправит команда send_outbox
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=to,
+    )
+
+
+def get_pending(max_attempts):
+    return OutboxEmail.objects.filter(
+        sent_at__isnull=True,
+        next_attempt_at__lte=timezone.now(),
+        attempts__lt=max_attempts,
+    ).order_by('pk')
+
+
+class OutboxDispatcher:
+    # Пачки блокируются SELECT ... FOR UPDATE SKIP LOCKED и отправляются
+    # через одно соединение; ошибки повторяются с растущей задержкой
+
+    def __init__(self, batch_size=100, max_attempts=None, rate_limit=None,
+                 backend=None, **backend_kwargs):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        if rate_limit is None:
+            rate_limit = settings.EMAIL_OUTBOX_RATE_LIMIT
+        self.interval = 1 / rate_limit if rate_limit else 0
+        self.backend = backend
+        self.backend_kwargs = backend_kwargs
+        self.next_send_at = 0
+
+    def drain(self):
+        # Возвращает (отправлено, с ошибкой)
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = self.send_batch()
+            if not sent and not failed:
+                return total_sent, total_failed
+            total_sent += sent
+            total_failed += failed
+
+    def send_batch(self):
+        with transaction.atomic():
+            emails = list(
+                get_pending(self.max_attempts).select_for_update(
+                    skip_locked=True
+                )[:self.batch_size]
+            )
+            if not emails:
+                return 0, 0
+            for email in emails:
+                email.attempts += 1
+                email.last_error = ''
+            sent = set()
+            try:
+                with get_connection(
+                        self.backend, **self.backend_kwargs
+                ) as connection:
+                    for email in emails:
+                        if self.send(connection, email):
+                            sent.add(email.pk)
+            except Exception as error:
+                # Соединение не открылось или оборвалось: неотправленные
+                # письма ждут следующей попытки
+                for email in emails:
+                    if email.pk not in sent and not email.last_error:
+                        self.fail(email, error)
+            # Отправленные письма отмечаются одним UPDATE
+            OutboxEmail.objects.filter(pk__in=sent).update(
+                attempts=F('attempts') + 1,
+                sent_at=timezone.now(),
+                last_error='',
+            )
+            failed = [email for email in emails if email.pk not in sent]
+            OutboxEmail.objects.bulk_update(
+                failed, ('attempts', 'next_attempt_at', 'last_error')
+            )
+        return len(sent), len(failed)
+
+    def send(self, connection, email):
+        self.throttle()
+        try:
+            connection.send_messages([EmailMessage(
+                email.subject, email.body, email.from_email, [email.to]
+            )])
+        except Exception as error:
+            self.fail(email, error)
+            return False
+        return True
+
+    def fail(self, email, error):
+        email.last_error = repr(error)
+        email.next_attempt_at = timezone.now() + timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+            * 2 ** (email.attempts - 1)
+        )
+
+    def throttle(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self.next_send_at > now:
+            time.sleep(self.next_send_at - now)
+        self.next_send_at = max(now, self.next_send_at) + self.interval
@@ -0,0 +1,16 @@
+import pytest
+from django.core.cache import cache
+
+from api.authentication import user_cache
+from api.throttling import blocked
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    user_cache.clear()
+    blocked.clear()
+    yield
+    cache.clear()
+    user_cache.clear()
+    blocked.clear()
@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def test_01_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (10, 2), (
+            'Проверьте, что при создании отзыва сохранённые сумма оценок и '
+            'количество отзывов произведения обновляются.'
+        )
+        assert title.rating == 5
+
+        response = user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[1]['id']
+            ),
+            data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (13, 2), (
+            'Проверьте, что при изменении оценки отзыва сохранённый '
+            'рейтинг произведения пересчитывается.'
+        )
+        assert title.rating == 6.5
+
+        response = user_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[1]['id']
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            'Проверьте, что при удалении отзыва сохранённый рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        admin.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating, title.rating_count) == (
+            0, None, 0
+        ), (
+            'Проверьте, что при каскадном удалении отзывов сохранённый '
+            'рейтинг произведения сбрасывается.'
+        )
+
+    def test_02_rebuild_ratings_command(self, admin_client, admin,
+                                        user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+
+        call_command('rebuild_ratings')
+
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (10, 2), (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает '
+            'сохранённые рейтинги произведений по отзывам.'
+        )
+        assert title.rating == 5
+        other_title = Title.objects.get(pk=titles[1]['id'])
+        assert other_title.rating is None
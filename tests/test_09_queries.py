@@ -0,0 +1,192 @@
+import pytest
+from django.db import IntegrityError
+
+from api.serializers import ReviewSerializer
+from reviews.models import Title
+from tests.utils import (
+    capture_queries, create_comments, create_single_comment,
+    create_single_review, create_titles, select_queries
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryCount:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def test_01_titles_fixed_number_of_queries(self, client, admin_client):
+        titles, categories, _ = create_titles(admin_client)
+        _, few_titles_queries = capture_queries(client.get, self.TITLES_URL)
+
+        for idx in range(5):
+            admin_client.post(self.TITLES_URL, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [titles[0]['genre'][0], titles[1]['genre'][0]],
+                'category': categories[idx % 2]['slug'],
+                'description': 'Описание'
+            })
+        _, many_titles_queries = capture_queries(
+            client.get, self.TITLES_URL
+        )
+
+        assert len(many_titles_queries) == len(few_titles_queries), (
+            f'Проверьте, что количество запросов к БД при GET-запросе к '
+            f'`{self.TITLES_URL}` не зависит от количества произведений на '
+            'странице: жанры и категории должны загружаться заранее.'
+        )
+        assert len(many_titles_queries) <= 3
+
+    def test_02_title_detail_fixed_number_of_queries(self, client,
+                                                     admin_client):
+        titles, _, _ = create_titles(admin_client)
+        _, queries = capture_queries(
+            client.get,
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert len(queries) <= 2, (
+            'Проверьте, что GET-запрос к '
+            f'`{self.TITLES_DETAIL_URL_TEMPLATE}` загружает произведение '
+            'вместе с категорией и жанрами за фиксированное число запросов.'
+        )
+
+    def test_03_reviews_and_comments_fixed_number_of_queries(
+            self, client, admin_client, admin, user_client,
+            moderator_client
+    ):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        _, few_reviews_queries = capture_queries(client.get, reviews_url)
+        _, few_comments_queries = capture_queries(client.get, comments_url)
+
+        for author_client in (user_client, moderator_client):
+            create_single_review(author_client, titles[0]['id'], 'Текст', 7)
+            create_single_comment(
+                author_client, titles[0]['id'], reviews[0]['id'], 'Текст'
+            )
+
+        _, reviews_queries = capture_queries(client.get, reviews_url)
+        _, comments_queries = capture_queries(client.get, comments_url)
+        assert len(reviews_queries) == len(few_reviews_queries), (
+            'Проверьте, что количество запросов к БД при GET-запросе к '
+            f'`{self.REVIEWS_URL_TEMPLATE}` не зависит от количества '
+            'авторов отзывов на странице.'
+        )
+        assert len(comments_queries) == len(few_comments_queries), (
+            'Проверьте, что количество запросов к БД при GET-запросе к '
+            f'`{self.COMMENTS_URL_TEMPLATE}` не зависит от количества '
+            'авторов комментариев на странице.'
+        )
+
+    def test_04_single_parent_lookup(self, client, admin_client, admin,
+                                     user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        nested = (
+            (reviews_url, reviews[0]['id'], 'reviews_title',
+             {'text': 'Текст', 'score': 7}),
+            (comments_url, comments[0]['id'], 'reviews_review',
+             {'text': 'Текст'}),
+        )
+        for url, object_id, parent_table, data in nested:
+            _, queries = capture_queries(client.get, url, 200)
+            assert len(select_queries(queries, parent_table)) == 1, (
+                f'Проверьте, что GET-запрос к `{url}` получает родительский '
+                'объект одним запросом.'
+            )
+            assert len(queries) <= 3
+
+            _, queries = capture_queries(client.get, f'{url}{object_id}/', 200)
+            assert len(queries) == 1, (
+                f'Проверьте, что GET-запрос к `{url}<id>/` выполняет один '
+                'запрос к БД, фильтруя объект по внешнему ключу.'
+            )
+
+            _, queries = capture_queries(user_client.post, url, 201, data=data)
+            assert len(select_queries(queries, parent_table)) == 1, (
+                f'Проверьте, что POST-запрос к `{url}` получает '
+                'родительский объект один раз.'
+            )
+
+        missing_url = self.REVIEWS_URL_TEMPLATE.format(title_id=100500)
+        capture_queries(client.get, missing_url, 404)
+        capture_queries(client.get, f'{missing_url}{reviews[0]["id"]}/', 404)
+        capture_queries(
+            user_client.post, missing_url, 404, data={'text': 'Т', 'score': 1}
+        )
+
+    def test_05_review_uniqueness_from_constraint(self, admin_client, admin):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        data = {'text': 'Текст', 'score': 7}
+        _, queries = capture_queries(admin_client.post, url, 201, data=data)
+        assert not any('LIMIT 1' in query for query in queries), (
+            f'Проверьте, что POST-запрос к `{url}` не проверяет уникальность '
+            'отзыва отдельным запросом, а полагается на ограничение БД.'
+        )
+
+        response = admin_client.post(url, data=data)
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Отзыв уже оставлен.']
+        }
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (7, 1), (
+            'Проверьте, что отклонённый повторный отзыв не меняет рейтинг '
+            'произведения.'
+        )
+
+    def test_06_signup_single_user_lookup(self, client, admin):
+        url = '/api/v1/auth/signup/'
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        _, queries = capture_queries(client.post, url, 200, data=data)
+        assert len(select_queries(queries, 'users_customuser')) == 1, (
+            f'Проверьте, что POST-запрос к `{url}` ищет пользователя по '
+            '`username` или `email` одним запросом.'
+        )
+        # Поиск, создание пользователя и письмо в очереди
+        assert len(queries) == 3
+
+        # Поиск, новый код подтверждения и письмо в очереди
+        _, queries = capture_queries(client.post, url, 200, data=data)
+        assert len(queries) == 3, (
+            f'Проверьте, что повторный POST-запрос к `{url}` переиспользует '
+            'найденного при валидации пользователя.'
+        )
+
+        response = client.post(
+            url, data={'username': 'new_user', 'email': admin.email}
+        )
+        assert response.status_code == 400
+        assert set(response.json()) == {'username', 'email'}
+
+    def test_07_other_integrity_errors_not_hidden(self, admin_client,
+                                                  monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        def failing_save(self, **kwargs):
+            raise IntegrityError('FOREIGN KEY constraint failed')
+
+        monkeypatch.setattr(ReviewSerializer, 'save', failing_save)
+        with pytest.raises(IntegrityError):
+            admin_client.post(url, data={'text': 'Текст', 'score': 7})
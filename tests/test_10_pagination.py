@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Comment
+from tests.utils import capture_queries, create_reviews
+
+
+def collect_pages(client, url):
+    results = []
+    responses = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        responses.append(data)
+        results.extend(item['id'] for item in data['results'])
+        url = data['next']
+    return results, responses
+
+
+def get_count_queries(client, url):
+    response, queries = capture_queries(client.get, url)
+    return response.json()['count'], [
+        query for query in queries if 'COUNT(' in query
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10Pagination:
+
+    USERS_URL = '/api/v1/users/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def test_01_keyset_pagination(self, client, admin_client, admin):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        comments = Comment.objects.bulk_create(
+            Comment(author=admin, review_id=reviews[0]['id'], text=str(idx))
+            for idx in range(23)
+        )
+        expected_ids = list(
+            Comment.objects.order_by('pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        assert len(expected_ids) == len(comments)
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        ) + '?pagination=cursor'
+
+        ids, pages = collect_pages(client, url)
+        assert ids == expected_ids, (
+            'Проверьте, что при курсорной пагинации `?pagination=cursor` '
+            'обход ссылок `next` возвращает все комментарии по порядку '
+            '`(pub_date, id)` без пропусков и повторов.'
+        )
+        assert len(pages) == 3
+        assert 'count' not in pages[0]
+        assert pages[0]['previous'] is None
+
+        response = client.get(pages[2]['previous'])
+        assert [item['id'] for item in response.json()['results']] == (
+            expected_ids[10:20]
+        ), (
+            'Проверьте, что ссылка `previous` при курсорной пагинации '
+            'возвращает предыдущую страницу.'
+        )
+
+        response = client.get(url.replace('cursor', 'cursor&cursor=broken'))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_cached_counts(self, admin_client, settings):
+        settings.PAGINATION_EXACT_COUNT_THRESHOLD = 0
+
+        count, count_queries = get_count_queries(admin_client, self.USERS_URL)
+        assert count == 1 and len(count_queries) == 1
+
+        count, count_queries = get_count_queries(admin_client, self.USERS_URL)
+        assert count == 1 and not count_queries, (
+            'Проверьте, что повторный GET-запрос к '
+            f'`{self.USERS_URL}` берёт значение `count` из кэша.'
+        )
+
+        admin_client.post(self.USERS_URL, data={
+            'username': 'new_user', 'email': 'new_user@yamdb.fake'
+        })
+        count, count_queries = get_count_queries(admin_client, self.USERS_URL)
+        assert count == 2 and len(count_queries) == 1, (
+            'Проверьте, что после изменения таблицы значение `count` в '
+            f'ответе на GET-запрос к `{self.USERS_URL}` пересчитывается.'
+        )
+
+    def test_03_exact_counts_for_small_tables(self, admin_client):
+        get_count_queries(admin_client, self.USERS_URL)
+        _, count_queries = get_count_queries(admin_client, self.USERS_URL)
+        assert len(count_queries) == 1
+
+    def test_04_review_count_from_title_counter(self, client, admin_client,
+                                                admin, user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        count, count_queries = get_count_queries(
+            client, self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert count == len(reviews) and not count_queries, (
+            'Проверьте, что значение `count` в списке отзывов берётся из '
+            'сохранённого количества отзывов произведения.'
+        )
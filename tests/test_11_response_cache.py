@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (
+    capture_queries, create_categories, create_genre, create_single_review,
+    create_titles
+)
+
+
+def get_with_queries(client, url):
+    response, queries = capture_queries(client.get, url)
+    return response.json(), len(queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCache:
+
+    CATEGORIES_URL = '/api/v1/categories/'
+    GENRES_URL = '/api/v1/genres/'
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.mark.parametrize('url,create', (
+        (CATEGORIES_URL, create_categories),
+        (GENRES_URL, create_genre),
+    ))
+    def test_01_catalogue_lists_are_cached(self, client, admin_client, url,
+                                           create):
+        objects = create(admin_client)
+        data, _ = get_with_queries(client, url)
+        cached_data, queries = get_with_queries(client, url)
+        assert cached_data == data and queries == 0, (
+            f'Проверьте, что повторный GET-запрос к `{url}` обслуживается '
+            'из кэша без запросов к БД.'
+        )
+
+        response = admin_client.delete(f'{url}{objects[0]["slug"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        data, queries = get_with_queries(client, url)
+        assert data['count'] == len(objects) - 1 and queries > 0, (
+            f'Проверьте, что после изменения данных кэш `{url}` '
+            'сбрасывается.'
+        )
+
+    def test_02_anonymous_titles_are_cached(self, client, admin_client,
+                                            user_client):
+        titles, _, _ = create_titles(admin_client)
+        get_with_queries(client, self.TITLES_URL)
+        _, queries = get_with_queries(client, self.TITLES_URL)
+        assert queries == 0, (
+            'Проверьте, что повторный GET-запрос анонимного пользователя '
+            f'к `{self.TITLES_URL}` обслуживается из кэша.'
+        )
+        _, queries = get_with_queries(admin_client, self.TITLES_URL)
+        assert queries > 0
+
+        create_single_review(user_client, titles[0]['id'], 'Текст', 7)
+        data, _ = get_with_queries(client, self.TITLES_URL)
+        ratings = {title['id']: title['rating'] for title in data['results']}
+        assert ratings[titles[0]['id']] == 7, (
+            'Проверьте, что после создания отзыва кэш списка произведений '
+            'сбрасывается и рейтинг обновляется.'
+        )
+
+        filtered_url = f'{self.TITLES_URL}?genre={titles[1]["genre"][0]}'
+        data, _ = get_with_queries(client, filtered_url)
+        assert [title['id'] for title in data['results']] == [
+            titles[1]['id']
+        ]
@@ -0,0 +1,127 @@
+import time
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+
+from tests.utils import (
+    capture_queries, create_comments, create_single_comment,
+    create_single_review
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def check_not_modified(self, client, url, **headers):
+        response, queries = capture_queries(
+            client.get, url, HTTPStatus.NOT_MODIFIED, **headers
+        )
+        assert not queries, (
+            f'Проверьте, что условный GET-запрос к `{url}` с актуальным '
+            'валидатором не обращается к БД.'
+        )
+        assert not response.content
+
+    def test_01_conditional_get(self, client, admin_client, admin,
+                                user_client, moderator_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        title_id = titles[0]['id']
+        urls = (
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id),
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title_id),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            ),
+        )
+        etags = {}
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.has_header('ETag'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовок `ETag`.'
+            )
+            assert response.has_header('Last-Modified')
+            etags[url] = response['ETag']
+            self.check_not_modified(
+                client, url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+            self.check_not_modified(
+                client, url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+
+        create_single_review(user_client, title_id, 'Текст', 3)
+        create_single_comment(user_client, title_id, reviews[0]['id'], 'Ок')
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после изменения данных условный GET-запрос '
+                f'к `{url}` возвращает полный ответ.'
+            )
+            assert response['ETag'] != etags[url]
+
+        other_title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[1]['id']
+        )
+        response = client.get(other_title_url)
+        create_single_review(moderator_client, title_id, 'Текст', 3)
+        self.check_not_modified(
+            client, other_title_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+    def test_02_username_scope(self, client, admin_client, admin, user,
+                               user_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        urls = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            ),
+        )
+        etags = {url: client.get(url)['ETag'] for url in urls}
+
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'newuser', 'email': 'newuser@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+        user.first_name = 'Имя'
+        user.save()
+        for url in urls:
+            self.check_not_modified(
+                client, url, HTTP_IF_NONE_MATCH=etags[url]
+            )
+
+        admin.username = 'renamed'
+        admin.save()
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что смена имени автора сбрасывает ETag его '
+                'отзывов и комментариев.'
+            )
+
+    def test_03_versions_expire(self, client):
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=123456)
+        assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+        assert cache.get('version:title:123456:reviews') is not None
+        expired = time.time() + settings.CACHE_VERSION_TIMEOUT + 1
+        with mock.patch(
+            'django.core.cache.backends.locmem.time.time',
+            return_value=expired,
+        ):
+            assert cache.get('version:title:123456:reviews') is None, (
+                'Проверьте, что версии, созданные при чтении, истекают.'
+            )
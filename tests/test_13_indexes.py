@@ -0,0 +1,77 @@
+import pytest
+from django.db import connection
+from django.db.models import CharField
+from django.db.models.functions import Lower
+
+from api.filters import TitleFilter
+from reviews.models import Comment, Review, Title
+from tests.utils import create_titles
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='Планы запросов проверяются только для SQLite.'
+)
+
+
+@pytest.mark.django_db
+class Test13Indexes:
+
+    @pytest.mark.parametrize('get_queryset,index', (
+        (
+            lambda: Review.objects.filter(title_id=1).order_by(
+                'pub_date', 'id'
+            ),
+            'review_title_pub_date_idx'
+        ),
+        (
+            lambda: Comment.objects.filter(review_id=1).order_by(
+                'pub_date', 'id'
+            ),
+            'comment_review_pub_date_idx'
+        ),
+        (
+            lambda: Title.objects.alias(name_lower=Lower('name')).filter(
+                name_lower='терминатор'
+            ),
+            'title_name_lower_idx'
+        ),
+        (lambda: Title.objects.filter(year=1984), 'title_year_idx'),
+        (lambda: Title.objects.order_by('rating')[:10], 'title_rating_idx'),
+    ))
+    def test_01_query_uses_index(self, get_queryset, index):
+        plan = get_queryset().explain()
+        assert index in plan, (
+            f'Проверьте, что запрос использует индекс `{index}`. '
+            f'План запроса: {plan}'
+        )
+
+    @pytest.mark.parametrize('params,index', (
+        ({'name': 'Терминатор'}, 'title_name_lower_idx'),
+        ({'year': '1984'}, 'title_year_idx'),
+        ({'genre': 'Horror'}, 'genre_slug_lower_idx'),
+        ({'category': 'FILMS'}, 'category_slug_lower_idx'),
+    ))
+    def test_02_title_filter_uses_index(self, params, index):
+        plan = TitleFilter(params, queryset=Title.objects.all()).qs.explain()
+        assert index in plan, (
+            f'Проверьте, что фильтр произведений по `{params}` использует '
+            f'индекс `{index}`. План запроса: {plan}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_title_filter_is_case_insensitive(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for query in ('genre=HORROR', 'category=Films', 'name=Терминатор',
+                      'year=1984'):
+            response = admin_client.get(f'/api/v1/titles/?{query}')
+            ids = [title['id'] for title in response.json()['results']]
+            assert ids == [titles[0]['id']], (
+                f'Проверьте, что фильтр `/api/v1/titles/?{query}` не зависит '
+                'от регистра и находит нужное произведение.'
+            )
+
+    def test_04_no_global_lookup(self):
+        assert 'lower' not in CharField.get_lookups(), (
+            'Проверьте, что фильтры не регистрируют преобразование '
+            '`__lower` для всех полей `CharField`.'
+        )
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+from reviews.search import get_search_backend
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Search:
+
+    SEARCH_URL = '/api/v1/search/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    @pytest.fixture(autouse=True)
+    def empty_index(self):
+        get_search_backend().clear()
+
+    def search(self, client, query):
+        response = client.get(self.SEARCH_URL, {'q': query})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.SEARCH_URL}` с параметром '
+            '`q` возвращает ответ со статусом 200.'
+        )
+        return response.json()
+
+    def test_01_search(self, client, admin_client, admin):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        assert client.get(self.SEARCH_URL).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+
+        data = self.search(client, 'терминатор')
+        assert data['count'] == 1
+        assert data['results'][0]['type'] == 'title'
+        assert data['results'][0]['object']['id'] == titles[0]['id']
+
+        data = self.search(client, 'review number')
+        assert [item['object']['id'] for item in data['results']] == [
+            reviews[0]['id']
+        ], 'Проверьте, что поиск находит отзывы по тексту.'
+        assert data['results'][0]['title_id'] == titles[0]['id']
+
+        data = self.search(client, 'comm')
+        assert data['results'][0]['type'] == 'comment', (
+            'Проверьте, что поиск находит комментарии по началу слова.'
+        )
+        assert data['results'][0]['review_id'] == reviews[0]['id']
+
+        response = client.get(
+            self.SEARCH_URL, {'q': 'number', 'type': 'comment'}
+        )
+        assert [item['type'] for item in response.json()['results']] == [
+            'comment'
+        ]
+
+        admin_client.delete(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        for query in ('терминатор', 'number'):
+            assert self.search(client, query)['count'] == 0, (
+                'Проверьте, что удалённые объекты удаляются из индекса.'
+            )
+
+    def test_02_ranking(self, admin_client):
+        for name, description in (
+            ('Описание', 'Фильм про дракона'),
+            ('Дракон', 'Фильм'),
+        ):
+            Title.objects.create(
+                name=name, year=2000, description=description
+            )
+        data = self.search(admin_client, 'дракон')
+        assert [item['object']['name'] for item in data['results']] == [
+            'Дракон', 'Описание'
+        ], 'Проверьте, что совпадения в названии ранжируются выше.'
+
+    def test_03_rebuild_command(self, client, admin_client, admin):
+        create_comments(admin_client, {admin: admin_client})
+        get_search_backend().clear()
+        assert self.search(client, 'number')['count'] == 0
+
+        call_command('rebuild_search_index')
+        assert self.search(client, 'number')['count'] == 2
+
+    def test_04_database_backend_pages_in_sql(self, admin, user):
+        backend = get_search_backend('reviews.search.DatabaseSearchBackend')
+        titles = [
+            Title.objects.create(name=f'Матрица {idx}', year=1999)
+            for idx in range(3)
+        ]
+        reviews = [
+            Review.objects.create(
+                title=titles[0], author=author, text='Матрица', score=5
+            )
+            for author in (admin, user)
+        ]
+        results = backend.search('Матрица')
+        assert results.count() == 5
+        expected = [('title', title.pk) for title in titles] + [
+            ('review', review.pk) for review in reviews
+        ]
+        with CaptureQueriesContext(connection) as context:
+            page = results[2:4]
+        assert [tuple(hit) for hit in page] == expected[2:4]
+        assert all('LIMIT' in query['sql']
+                   for query in context.captured_queries), (
+            'Проверьте, что страница результатов поиска выбирается в SQL, '
+            'а не срезом списка всех найденных объектов.'
+        )
+        assert [tuple(hit) for hit in results[0:10]] == expected
+        assert [tuple(hit) for hit in results[4:]] == expected[4:]
+        assert results[5:7] == []
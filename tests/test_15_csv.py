@@ -0,0 +1,204 @@
+import csv
+import json
+import os
+import shutil
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from reviews.export import get_export_fields
+from reviews.management.commands.import_csv import Command, TABLES_DICT
+from reviews.models import Category, Review, Title
+
+DATA_DIR = f'{settings.BASE_DIR}/static/data'
+
+
+def count_csv_rows(filename):
+    path = os.path.join(DATA_DIR, filename)
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        return sum(1 for _ in csv.DictReader(csv_file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Csv:
+
+    @pytest.mark.parametrize('workers', (1, 3))
+    def test_01_import_csv(self, workers):
+        out = StringIO()
+        call_command(
+            'import_csv', batch_size=7, workers=workers, verbosity=2,
+            stdout=out
+        )
+        for model, filename in TABLES_DICT.items():
+            assert model.objects.count() == count_csv_rows(filename), (
+                f'Проверьте, что команда `import_csv` загружает все строки '
+                f'файла `{filename}`.'
+            )
+            assert f'{model._meta.db_table}: ' in out.getvalue(), (
+                'Проверьте, что команда `import_csv` сообщает о ходе '
+                'загрузки каждой таблицы.'
+            )
+        assert Title.objects.filter(rating_count__gt=0).exists()
+
+    def test_02_upsert_is_idempotent(self, tmp_path):
+        call_command('import_csv', upsert=True, data_dir=DATA_DIR,
+                     checkpoint=str(tmp_path / 'checkpoint.json'),
+                     stdout=StringIO())
+        category = Category.objects.first()
+        category.name = 'Изменено'
+        category.save()
+
+        out = StringIO()
+        call_command('import_csv', upsert=True, data_dir=DATA_DIR,
+                     checkpoint=str(tmp_path / 'checkpoint.json'), stdout=out)
+        for model, filename in TABLES_DICT.items():
+            assert model.objects.count() == count_csv_rows(filename), (
+                'Проверьте, что повторный запуск `import_csv --upsert` не '
+                'создаёт дубликатов.'
+            )
+        rows = count_csv_rows('category.csv')
+        assert (
+            f'inserted 0, updated 1, skipped {rows - 1}' in out.getvalue()
+        ), (
+            'Проверьте, что `import_csv --upsert` обновляет изменившиеся '
+            'строки, пропускает совпадающие и сообщает их количество.'
+        )
+        reviews = count_csv_rows('review.csv')
+        assert f'inserted 0, updated 0, skipped {reviews}' in out.getvalue()
+        assert Category.objects.get(pk=category.pk).name != 'Изменено'
+
+    def test_03_upsert_resumes_from_checkpoint(self, tmp_path, monkeypatch):
+        data_dir = tmp_path / 'data'
+        shutil.copytree(DATA_DIR, data_dir)
+        upsert_batch = Command.upsert_batch
+        calls = []
+
+        def crashing_upsert_batch(self, model, *args):
+            if model is Review:
+                calls.append(model)
+                if len(calls) == 3:
+                    raise RuntimeError('crash')
+            return upsert_batch(self, model, *args)
+
+        monkeypatch.setattr(Command, 'upsert_batch', crashing_upsert_batch)
+        with pytest.raises(RuntimeError):
+            call_command('import_csv', upsert=True, data_dir=str(data_dir),
+                         batch_size=5, stdout=StringIO())
+        assert Review.objects.count() == 10
+        assert os.path.exists(data_dir / '.import_checkpoint.json')
+
+        monkeypatch.setattr(Command, 'upsert_batch', upsert_batch)
+        out = StringIO()
+        call_command('import_csv', upsert=True, data_dir=str(data_dir),
+                     batch_size=5, stdout=out)
+        reviews = count_csv_rows('review.csv')
+        assert Review.objects.count() == reviews
+        assert (
+            f'reviews_review: {reviews - 10} rows' in out.getvalue()
+        ), (
+            'Проверьте, что `import_csv --upsert` после сбоя продолжает '
+            'загрузку с последней сохранённой позиции.'
+        )
+        assert f'inserted {reviews - 10}, updated 0, skipped 10' in (
+            out.getvalue()
+        )
+        assert not os.path.exists(data_dir / '.import_checkpoint.json')
+
+    def test_04_export_round_trip(self, tmp_path):
+        call_command('import_csv', stdout=StringIO())
+        call_command('export_csv', output_dir=str(tmp_path), chunk_size=10,
+                     stdout=StringIO())
+        for model, filename in TABLES_DICT.items():
+            assert count_csv_rows(tmp_path / filename) == (
+                model.objects.count()
+            ), (
+                f'Проверьте, что команда `export_csv` выгружает все строки '
+                f'таблицы в файл `{filename}`.'
+            )
+
+        out = StringIO()
+        call_command('import_csv', upsert=True, data_dir=str(tmp_path),
+                     stdout=out)
+        assert 'inserted 0, updated 0' in out.getvalue()
+        assert 'updated 1' not in out.getvalue(), (
+            'Проверьте, что выгрузка `export_csv` загружается обратно '
+            'командой `import_csv` без изменений.'
+        )
+
+    def test_05_export_into_empty_database(self, tmp_path, user):
+        call_command('import_csv', stdout=StringIO())
+        call_command('export_csv', output_dir=str(tmp_path), stdout=StringIO())
+        exported = {
+            model: list(model.objects.order_by('pk').values(
+                *get_export_fields(model)
+            ))
+            for model in TABLES_DICT
+        }
+        call_command('flush', interactive=False)
+
+        call_command('import_csv', data_dir=str(tmp_path), stdout=StringIO())
+        for model, rows in exported.items():
+            assert list(model.objects.order_by('pk').values(
+                *get_export_fields(model)
+            )) == rows, (
+                'Проверьте, что выгрузка `export_csv` загружается командой '
+                '`import_csv` в пустую БД без изменений.'
+            )
+
+    def test_06_export_endpoint(self, client, user_client, admin_client):
+        call_command('import_csv', stdout=StringIO())
+        url = '/api/v1/export/review/'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+        assert admin_client.get('/api/v1/export/unknown/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+        response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос администратора к `{url}` '
+            'возвращает ответ со статусом 200.'
+        )
+        assert response.streaming
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == 'id,author_id,title_id,text,score,pub_date'
+
+        response = admin_client.get(url, {'output': 'ndjson'})
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        assert len(rows) == count_csv_rows('review.csv')
+        assert rows[0]['id'] == 1
+
+    def test_07_upsert_invalidates_cache(self, client, tmp_path):
+        data_dir = tmp_path / 'data'
+        shutil.copytree(DATA_DIR, data_dir)
+        call_command('import_csv', upsert=True, data_dir=str(data_dir),
+                     stdout=StringIO())
+        url = '/api/v1/categories/'
+        response = client.get(url)
+        assert response.json()['results'][0]['name'] != 'Изменено'
+        etag = client.get('/api/v1/titles/1/')['ETag']
+
+        category_csv = data_dir / 'category.csv'
+        category_csv.write_text(
+            category_csv.read_text(encoding='utf-8').replace(
+                '1,Фильм,movie', '1,Изменено,movie'
+            ),
+            encoding='utf-8',
+        )
+        call_command('import_csv', upsert=True, data_dir=str(data_dir),
+                     stdout=StringIO())
+        names = [category['name'] for category in client.get(url).json()[
+            'results'
+        ]]
+        assert 'Изменено' in names, (
+            'Проверьте, что `import_csv --upsert` сбрасывает кэш списков.'
+        )
+        response = client.get('/api/v1/titles/1/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
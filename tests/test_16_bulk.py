@@ -0,0 +1,254 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from api.views import ReviewViewSet
+from reviews.models import Comment, Review, Title
+from reviews.search import get_search_backend
+from tests.utils import capture_queries, create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16BulkCreate:
+
+    REVIEWS_BULK_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/bulk/'
+    COMMENTS_BULK_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/bulk/'
+    )
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture(autouse=True)
+    def empty_index(self):
+        get_search_backend().clear()
+
+    def test_01_bulk_create_reviews(self, client, admin_client, admin,
+                                    moderator, user):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_BULK_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        client.get(self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']))
+        data = [
+            {'text': 'от администратора', 'score': 4},
+            {'text': 'от модератора', 'score': 8, 'author': moderator.username},
+            {'text': 'повтор', 'score': 5, 'author': moderator.username},
+            {'text': 'без оценки'},
+            {'text': 'неизвестный автор', 'score': 1, 'author': 'nobody'},
+            {'text': 'от пользователя', 'score': 6, 'author': user.username},
+        ]
+        response, queries = capture_queries(
+            admin_client.post, url, HTTPStatus.MULTI_STATUS, data=data,
+            format='json'
+        )
+        results = response.json()
+        assert [result['status'] for result in results] == [
+            201, 201, 400, 400, 400, 201
+        ], 'Проверьте, что ответ содержит результат для каждого элемента.'
+        created = Review.objects.filter(title_id=titles[0]['id'])
+        assert sorted(created.values_list('id', flat=True)) == sorted(
+            results[index]['data']['id'] for index in (0, 1, 5)
+        ), 'Проверьте, что в ответе возвращаются id созданных отзывов.'
+        assert results[1]['data']['author'] == moderator.username
+        assert len(queries) < 15, (
+            'Проверьте, что массовое создание отзывов не выполняет '
+            'запросов к базе данных на каждый элемент списка.'
+        )
+
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (18, 3), (
+            'Проверьте, что массовое создание отзывов обновляет рейтинг '
+            'произведения.'
+        )
+        response = client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert response.json()['count'] == 3, (
+            'Проверьте, что после массового создания отзывов закэшированные '
+            'ответы сбрасываются.'
+        )
+        assert get_search_backend().search('модератора').count() == 1
+
+        response = admin_client.post(url, data=data[:1], format='json')
+        assert response.status_code == HTTPStatus.MULTI_STATUS
+        assert response.json()[0]['errors']['non_field_errors'], (
+            'Проверьте, что массовое создание не позволяет оставить второй '
+            'отзыв на то же произведение.'
+        )
+
+    def test_02_bulk_create_permissions(self, client, user_client, admin):
+        titles = [Title.objects.create(name='Титаник', year=1997)]
+        url = self.REVIEWS_BULK_URL_TEMPLATE.format(title_id=titles[0].id)
+        data = [{'text': 'текст', 'score': 5}]
+        response = client.post(
+            url, data=json.dumps(data), content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        response = user_client.post(
+            url, data=[{'text': 'текст', 'score': 5, 'author': 'TestAdmin'}],
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.MULTI_STATUS
+        assert not Review.objects.exists(), (
+            'Проверьте, что пользователь не может создавать отзывы от имени '
+            'других пользователей.'
+        )
+        response = user_client.post(url, data={'text': 'текст'}, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = user_client.post(url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+
+    def test_03_bulk_create_comments(self, admin_client, admin, user):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = self.COMMENTS_BULK_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        data = [{'text': 'одинаковый'} for _ in range(3)] + [
+            {'text': 'от пользователя', 'author': user.username}
+        ]
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        results = response.json()
+        ids = [result['data']['id'] for result in results]
+        assert sorted(ids) == sorted(
+            Comment.objects.values_list('id', flat=True)
+        ), 'Проверьте, что в ответе возвращаются id созданных комментариев.'
+        assert len(set(ids)) == len(data)
+        assert Comment.objects.get(pk=ids[3]).author == user
+
+    def test_04_bulk_write_titles(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/bulk/'
+        client.get('/api/v1/titles/')
+        data = [
+            {
+                'name': f'Фильм {idx}',
+                'year': 2000 + idx,
+                'description': 'описание',
+                'genre': [genres[idx % 3]['slug'], genres[2]['slug']],
+                'category': categories[idx % 2]['slug'],
+            }
+            for idx in range(50)
+        ] + [
+            {'id': titles[0]['id'], 'year': 1985, 'genre': [genres[2]['slug']]},
+            {'id': titles[1]['id'], 'name': 'Крепкий орешек 2'},
+            {'name': 'Без жанра', 'year': 2001, 'description': 'описание',
+             'genre': ['unknown']},
+            {'id': 100500, 'name': 'Не существует'},
+            {'name': 'Без года', 'description': 'описание'},
+        ]
+        assert client.post(url, data=json.dumps(data[:1]),
+                           content_type='application/json').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        response, queries = capture_queries(
+            admin_client.post, url, HTTPStatus.MULTI_STATUS, data=data,
+            format='json'
+        )
+        results = response.json()
+        assert [result['status'] for result in results[50:]] == [
+            200, 200, 400, 400, 400
+        ], 'Проверьте, что ответ содержит результат для каждого элемента.'
+        assert len(queries) < 20, (
+            'Проверьте, что массовая запись произведений разрешает слаги '
+            'категорий и жанров одним запросом и сохраняет произведения и '
+            'их жанры массовыми запросами.'
+        )
+
+        new_ids = [result['data']['id'] for result in results[:50]]
+        created = Title.objects.prefetch_related('genre').in_bulk(new_ids)
+        assert len(created) == 50
+        for idx, title_id in enumerate(new_ids):
+            title = created[title_id]
+            assert title.name == f'Фильм {idx}'
+            assert title.category.slug == categories[idx % 2]['slug']
+            assert {genre.slug for genre in title.genre.all()} == {
+                genres[idx % 3]['slug'], genres[2]['slug']
+            }
+
+        first = Title.objects.get(pk=titles[0]['id'])
+        assert (first.name, first.year) == ('Терминатор', 1985)
+        assert [genre.slug for genre in first.genre.all()] == [
+            genres[2]['slug']
+        ], 'Проверьте, что переданные жанры заменяют жанры произведения.'
+        assert results[51]['data']['genre'] == titles[1]['genre']
+        assert Title.objects.get(pk=titles[1]['id']).name == (
+            'Крепкий орешек 2'
+        )
+
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 52, (
+            'Проверьте, что после массовой записи произведений '
+            'закэшированные ответы сбрасываются.'
+        )
+        assert get_search_backend().search('орешек').count() == 1
+
+    def test_05_concurrent_duplicate_review(self, admin_client, user,
+                                            user_client, moderator,
+                                            monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        reject_taken = ReviewViewSet.reject_taken
+        calls = []
+
+        def racing_reject_taken(self, title, reviews, results):
+            # Первая проверка проходит до того, как параллельный запрос
+            # сохранит отзыв модератора
+            calls.append(title)
+            if len(calls) == 1:
+                result = reject_taken(self, title, reviews, results)
+                Review.objects.create(
+                    title=title, author=moderator, text='Текст', score=5
+                )
+                return result
+            return reject_taken(self, title, reviews, results)
+
+        monkeypatch.setattr(
+            ReviewViewSet, 'reject_taken', racing_reject_taken
+        )
+        response = admin_client.post(
+            self.REVIEWS_BULK_URL_TEMPLATE.format(title_id=title_id),
+            data=[
+                {'text': 'от модератора', 'score': 8,
+                 'author': moderator.username},
+                {'text': 'от пользователя', 'score': 6,
+                 'author': user.username},
+            ],
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.MULTI_STATUS, (
+            'Проверьте, что отзыв, сохранённый параллельным запросом, '
+            'отклоняется ошибкой элемента, а не ошибкой сервера.'
+        )
+        assert [result['status'] for result in response.json()] == [
+            400, 201
+        ]
+        assert response.json()[0]['errors']['non_field_errors']
+        title = Title.objects.get(pk=title_id)
+        assert title.reviews.count() == 2
+        assert title.rating_count == 2
+
+        response = user_client.post(
+            self.REVIEWS_BULK_URL_TEMPLATE.format(title_id=titles[1]['id']),
+            data=[{'text': 'Текст', 'score': 5, 'author': 'nobody'}],
+            format='json',
+        )
+        assert response.json()[0]['errors']['author'] == [
+            'Пользователь не найден.'
+        ]
+
+    def test_06_bulk_titles_duplicate_genres(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        slug = genres[0]['slug']
+        response = admin_client.post('/api/v1/titles/bulk/', data=[{
+            'name': 'Повтор жанра', 'year': 2000, 'description': 'описание',
+            'genre': [slug, slug], 'category': categories[0]['slug'],
+        }], format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        result = response.json()[0]['data']
+        assert result['genre'] == [slug], (
+            'Проверьте, что повторяющиеся жанры в массовой записи '
+            'произведений сохраняются один раз.'
+        )
+        response = client.get(f'/api/v1/titles/{result["id"]}/')
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            slug
+        ]
@@ -0,0 +1,132 @@
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+from users.models import OutboxEmail
+from users.outbox import OutboxDispatcher, enqueue_email
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def test_01_signup_enqueues_email(self, client):
+        data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        response = client.post(self.URL_SIGNUP, data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert not mail.outbox, (
+            f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` не отправляет '
+            'письмо в процессе обработки запроса.'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.to == data['email'] and email.sent_at is None, (
+            f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` ставит письмо '
+            'с кодом подтверждения в очередь.'
+        )
+
+        call_command('send_outbox')
+        assert [message.to for message in mail.outbox] == [[data['email']]]
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.attempts == 1
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что команда `send_outbox` не отправляет письма '
+            'повторно.'
+        )
+
+    def test_02_send_in_batches(self):
+        for idx in range(7):
+            enqueue_email('Тема', 'Текст', f'user{idx}@yamdb.fake')
+        call_command('send_outbox', batch_size=3)
+        assert len(mail.outbox) == 7, (
+            'Проверьте, что команда `send_outbox` отправляет все письма из '
+            'очереди пачками по `--batch-size`.'
+        )
+        assert not OutboxEmail.objects.filter(sent_at__isnull=True).exists()
+
+    def test_03_retry_failed_emails(self, monkeypatch, settings):
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 0
+        email = enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+        enqueue_email('Тема', 'Текст', 'other@yamdb.fake')
+        send_messages = EmailBackend.send_messages
+
+        def flaky_send_messages(backend, messages):
+            if messages[0].to == ['user@yamdb.fake']:
+                raise ConnectionError('SMTP недоступен')
+            return send_messages(backend, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', flaky_send_messages)
+        call_command('send_outbox', max_attempts=3)
+        email.refresh_from_db()
+        assert (email.attempts, email.sent_at) == (3, None), (
+            'Проверьте, что команда `send_outbox` повторяет отправку '
+            'письма при ошибке не больше `--max-attempts` раз.'
+        )
+        assert 'SMTP' in email.last_error
+        assert [message.to for message in mail.outbox] == [
+            ['other@yamdb.fake']
+        ]
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', send_messages)
+        call_command('send_outbox', max_attempts=4)
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.attempts == 4
+        assert not email.last_error
+
+    def test_04_retry_delay(self, monkeypatch):
+        email = enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+
+        def failing_open(backend):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'open', failing_open, raising=False)
+        call_command('send_outbox')
+        email.refresh_from_db()
+        assert email.attempts == 1 and email.next_attempt_at > (
+            email.created_at
+        ), (
+            'Проверьте, что письмо, которое не удалось отправить, '
+            'откладывается до следующей попытки.'
+        )
+
+    def test_05_one_connection_per_batch(self, monkeypatch):
+        for idx in range(5):
+            enqueue_email('Тема', 'Текст', f'user{idx}@yamdb.fake')
+        opened = []
+        open_connection = EmailBackend.open
+
+        def counting_open(backend):
+            opened.append(backend)
+            return open_connection(backend)
+
+        monkeypatch.setattr(EmailBackend, 'open', counting_open)
+        call_command('send_outbox', batch_size=2)
+        assert len(mail.outbox) == 5
+        assert len(opened) == 3, (
+            'Проверьте, что письма одной пачки отправляются через одно '
+            'соединение с почтовым сервером.'
+        )
+
+    def test_06_rate_limit(self, monkeypatch):
+        for idx in range(4):
+            enqueue_email('Тема', 'Текст', f'user{idx}@yamdb.fake')
+        clock = [1000.0]
+        sleeps = []
+
+        def sleep(delay):
+            sleeps.append(delay)
+            clock[0] += delay
+
+        monkeypatch.setattr('users.outbox.time.monotonic', lambda: clock[0])
+        monkeypatch.setattr('users.outbox.time.sleep', sleep)
+        OutboxDispatcher(rate_limit=2).drain()
+        assert len(mail.outbox) == 4
+        assert sleeps == [0.5, 0.5, 0.5], (
+            'Проверьте, что отправка писем ограничена заданным числом '
+            'писем в секунду.'
+        )
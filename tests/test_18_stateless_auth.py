@@ -0,0 +1,144 @@
+import time
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.db.models import F
+from rest_framework.test import APIClient
+
+from api.authentication import get_token_for_user
+from reviews.models import Title
+from tests.utils import capture_queries, select_queries
+from users.models import CustomUser
+
+
+def get_claims_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(user)}'
+    )
+    return client
+
+
+def get_user_queries(client, url, expected_status=HTTPStatus.OK):
+    _, queries = capture_queries(client.get, url, expected_status)
+    return select_queries(queries, 'users_customuser')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18StatelessAuthentication:
+
+    USERS_URL = '/api/v1/users/'
+    USER_DETAIL_URL_TEMPLATE = '/api/v1/users/{username}/'
+    ME_URL = '/api/v1/users/me/'
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_no_user_query(self, admin, user):
+        admin_client = get_claims_client(admin)
+        get_user_queries(admin_client, self.TITLES_URL)
+        assert not get_user_queries(admin_client, self.TITLES_URL), (
+            'Проверьте, что запрос с токеном, содержащим роль '
+            'пользователя, не загружает пользователя из БД.'
+        )
+
+        user_client = get_claims_client(user)
+        get_user_queries(user_client, self.USERS_URL, HTTPStatus.FORBIDDEN)
+        assert not get_user_queries(
+            user_client, self.USERS_URL, HTTPStatus.FORBIDDEN
+        )
+
+    def test_02_writes_with_claims_user(self, user):
+        title = Title.objects.create(name='Титаник', year=1997)
+        client = get_claims_client(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.post(url, data={'text': 'Текст', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+        review_url = f'{url}{response.json()["id"]}/'
+        response = client.patch(review_url, data={'score': 6})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что автор может редактировать свой отзыв, '
+            'авторизуясь токеном с ролью.'
+        )
+
+    def test_03_me_loads_full_user(self, user):
+        client = get_claims_client(user)
+        response = client.get(self.ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+        assert response.json()['bio'] == user.bio
+
+        response = client.patch(self.ME_URL, data={'first_name': 'Имя'})
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert (user.first_name, user.email) == ('Имя', 'testuser@yamdb.fake')
+        response = client.get(self.ME_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение полей, не попадающих в токен, не '
+            'отзывает токен.'
+        )
+
+    def test_04_role_change_revokes_tokens(self, admin, user):
+        admin_client = get_claims_client(admin)
+        user_client = get_claims_client(user)
+        assert user_client.get(self.ME_URL).status_code == HTTPStatus.OK
+
+        response = admin_client.patch(
+            self.USER_DETAIL_URL_TEMPLATE.format(username=user.username),
+            data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.USERS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что после изменения роли пользователя выданные ему '
+            'токены перестают действовать.'
+        )
+        user.refresh_from_db()
+        assert get_claims_client(user).get(self.USERS_URL).status_code == (
+            HTTPStatus.OK
+        )
+
+        admin.delete()
+        assert admin_client.get(self.TITLES_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что токены удалённого пользователя не действуют.'
+
+    def test_05_tokens_without_claims(self, user_client, user):
+        queries = get_user_queries(user_client, self.ME_URL)
+        assert len(queries) == 1, (
+            'Проверьте, что токены без роли по-прежнему принимаются, а '
+            'пользователь загружается из БД.'
+        )
+
+    def test_06_versions_from_other_processes(self, user):
+        client = get_claims_client(user)
+        assert client.get(self.ME_URL).status_code == HTTPStatus.OK
+
+        # Другой процесс меняет роль, кэш этого процесса не обновляется
+        CustomUser.objects.filter(pk=user.pk).update(
+            role='admin', token_version=F('token_version') + 1
+        )
+        user.refresh_from_db()
+        new_client = get_claims_client(user)
+        assert new_client.get(self.USERS_URL).status_code == HTTPStatus.OK, (
+            'Проверьте, что токен с более новой версией принимается, даже '
+            'если в кэше процесса хранится старая версия.'
+        )
+
+        CustomUser.objects.filter(pk=user.pk).update(
+            token_version=F('token_version') + 1
+        )
+        assert new_client.get(self.ME_URL).status_code == HTTPStatus.OK
+        expired = time.time() + settings.AUTH_USER_CACHE_TIMEOUT + 1
+        with mock.patch(
+            'django.core.cache.backends.locmem.time.time',
+            return_value=expired,
+        ):
+            assert new_client.get(self.ME_URL).status_code == (
+                HTTPStatus.UNAUTHORIZED
+            ), (
+                'Проверьте, что версия токена в кэше истекает и отозванный '
+                'в другом процессе токен перестаёт действовать.'
+            )
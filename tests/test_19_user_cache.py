@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.authentication import user_cache
+from tests.utils import capture_queries, select_queries
+
+
+def count_user_queries(method, url, expected_status=HTTPStatus.OK):
+    _, queries = capture_queries(method, url, expected_status)
+    return len(select_queries(queries, 'users_customuser'))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19UserCache:
+
+    USERS_URL = '/api/v1/users/'
+    USER_DETAIL_URL_TEMPLATE = '/api/v1/users/{username}/'
+    ME_URL = '/api/v1/users/me/'
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_repeated_requests_skip_user_lookup(self, user_client):
+        assert count_user_queries(user_client.get, self.TITLES_URL) == 1
+        assert count_user_queries(user_client.get, self.TITLES_URL) == 0, (
+            'Проверьте, что повторные запросы с тем же токеном берут '
+            'пользователя из кэша, не обращаясь к БД.'
+        )
+        assert user_cache.stats() == {
+            'size': 1, 'hits': 1, 'misses': 1, 'hit_rate': 0.5
+        }
+
+    def test_02_invalidation(self, admin_client, user_client, user):
+        user_url = self.USER_DETAIL_URL_TEMPLATE.format(
+            username=user.username
+        )
+        count_user_queries(
+            user_client.get, self.USERS_URL, HTTPStatus.FORBIDDEN
+        )
+        response = admin_client.patch(user_url, data={'role': 'admin'})
+        assert response.status_code == HTTPStatus.OK
+        queries = count_user_queries(user_client.get, self.USERS_URL)
+        cached_queries = count_user_queries(user_client.get, self.USERS_URL)
+        assert queries == cached_queries + 1, (
+            'Проверьте, что изменение пользователя администратором '
+            'сбрасывает его запись в кэше пользователей.'
+        )
+
+        response = user_client.patch(self.ME_URL, data={'bio': 'новое'})
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.ME_URL).json()['bio'] == 'новое', (
+            'Проверьте, что изменение через `/users/me/` сбрасывает запись '
+            'в кэше пользователей.'
+        )
+
+        response = admin_client.delete(user_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert user_client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что удалённый пользователь не остаётся в кэше '
+            'пользователей.'
+        )
+
+    def test_03_lru_and_ttl(self, monkeypatch):
+        cache = type(user_cache)(maxsize=2, timeout=10)
+        clock = [100.0]
+        monkeypatch.setattr('api.cache.time.monotonic', lambda: clock[0])
+        cache.set(1, 'first')
+        cache.set(2, 'second')
+        assert cache.get(1) == 'first'
+        cache.set(3, 'third')
+        assert cache.get(2) is None, (
+            'Проверьте, что при переполнении вытесняется давно не '
+            'использованная запись.'
+        )
+        assert cache.get(1) == 'first'
+        clock[0] += 11
+        assert cache.get(1) is None and cache.get(3) is None, (
+            'Проверьте, что записи кэша пользователей истекают.'
+        )
@@ -0,0 +1,125 @@
+import re
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from tests.utils import capture_queries, select_queries
+
+
+def sign_up(client, data):
+    response = client.post('/api/v1/auth/signup/', data=data)
+    assert response.status_code == HTTPStatus.OK
+    call_command('send_outbox')
+    return re.search(r'\d+', mail.outbox[-1].body).group()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ConfirmationCode:
+
+    URL_TOKEN = '/api/v1/auth/token/'
+    DATA = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+
+    def test_01_code_format_and_storage(self, client, django_user_model):
+        code = sign_up(client, self.DATA)
+        assert len(code) == 6, (
+            'Проверьте, что код подтверждения состоит из 6 цифр.'
+        )
+        user = django_user_model.objects.get(username=self.DATA['username'])
+        assert code not in user.confirmation_code, (
+            'Проверьте, что код подтверждения хранится в БД в виде хэша.'
+        )
+        assert user.confirmation_code_expires_at > timezone.now()
+
+    def test_02_obtain_token_single_lookup(self, client):
+        code = sign_up(client, self.DATA)
+        data = {'username': self.DATA['username'], 'confirmation_code': code}
+        response, queries = capture_queries(
+            client.post, self.URL_TOKEN, data=data
+        )
+        assert 'token' in response.json()
+        assert len(select_queries(queries, 'users_customuser')) == 1, (
+            f'Проверьте, что POST-запрос к `{self.URL_TOKEN}` проверяет код '
+            'подтверждения одним запросом к БД.'
+        )
+        # Поиск пользователя и сброс использованного кода
+        assert len(queries) == 2
+
+        response = client.get(
+            '/api/v1/users/me/',
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        assert response.json()['username'] == self.DATA['username']
+
+    def test_03_invalid_codes(self, client, django_user_model):
+        old_code = sign_up(client, self.DATA)
+        code = sign_up(client, self.DATA)
+        if old_code != code:
+            response = client.post(self.URL_TOKEN, data={
+                'username': self.DATA['username'],
+                'confirmation_code': old_code,
+            })
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что повторная регистрация заменяет код '
+                'подтверждения.'
+            )
+
+        django_user_model.objects.filter(
+            username=self.DATA['username']
+        ).update(confirmation_code_expires_at=timezone.now() - timedelta(1))
+        response = client.post(self.URL_TOKEN, data={
+            'username': self.DATA['username'], 'confirmation_code': code
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что просроченный код подтверждения не принимается.'
+        )
+
+    def test_04_user_created_by_admin(self, admin_client, client):
+        response = admin_client.post('/api/v1/users/', data=self.DATA)
+        assert response.status_code == HTTPStatus.CREATED
+        response = client.post(self.URL_TOKEN, data={
+            'username': self.DATA['username'], 'confirmation_code': ''
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        code = sign_up(client, self.DATA)
+        response = client.post(self.URL_TOKEN, data={
+            'username': self.DATA['username'], 'confirmation_code': code
+        })
+        assert response.status_code == HTTPStatus.OK
+
+    def test_05_single_use_and_attempt_limit(self, client, settings):
+        code = sign_up(client, self.DATA)
+        data = {'username': self.DATA['username'], 'confirmation_code': code}
+        assert client.post(self.URL_TOKEN, data=data).status_code == (
+            HTTPStatus.OK
+        )
+        assert client.post(self.URL_TOKEN, data=data).status_code == (
+            HTTPStatus.BAD_REQUEST
+        ), 'Проверьте, что код подтверждения действует только один раз.'
+
+        code = sign_up(client, self.DATA)
+        wrong_code = str((int(code) + 1) % 10 ** 6).zfill(6)
+        for _ in range(settings.CONFIRMATION_CODE_MAX_ATTEMPTS):
+            response = client.post(self.URL_TOKEN, data={
+                'username': self.DATA['username'],
+                'confirmation_code': wrong_code,
+            })
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.post(self.URL_TOKEN, data={
+            'username': self.DATA['username'], 'confirmation_code': code
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что после нескольких неверных попыток код '
+            'подтверждения перестаёт действовать.'
+        )
+
+        code = sign_up(client, self.DATA)
+        response = client.post(self.URL_TOKEN, data={
+            'username': self.DATA['username'], 'confirmation_code': code
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый код подтверждения снова принимается.'
+        )
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.state import token_backend
+
+from api.authentication import get_token_for_user
+from api.tokens import HMACTokenBackend, get_token_backend
+
+
+@pytest.fixture
+def backend():
+    return get_token_backend('api.tokens.HMACTokenBackend')
+
+
+class Test21TokenBackend:
+
+    def test_01_same_tokens_as_pyjwt(self, backend):
+        payload = {'user_id': 1, 'role': 'user', 'exp': 4102444800}
+        assert backend.encode(payload) == token_backend.encode(payload), (
+            'Проверьте, что токены, подписанные `HMACTokenBackend`, '
+            'совпадают с токенами PyJWT.'
+        )
+        assert backend.decode(token_backend.encode(payload)) == payload
+
+    def test_02_invalid_tokens(self, backend):
+        payload = {'user_id': 1, 'exp': 4102444800}
+        token = backend.encode(payload)
+        header, body, signature = token.split('.')
+        other = HMACTokenBackend('HS256', 'другой ключ')
+        invalid_tokens = (
+            other.encode(payload),
+            f'{header}.{body}.{signature[:-2]}AA',
+            f'{header}.{body}',
+            'не токен',
+            backend.encode({'user_id': 1, 'exp': 1}),
+            backend.encode({'user_id': 1, 'exp': 'завтра'}),
+            HMACTokenBackend('HS512', backend.signing_key).encode(payload),
+        )
+        for invalid_token in invalid_tokens:
+            with pytest.raises(TokenBackendError):
+                backend.decode(invalid_token)
+        assert backend.decode(other.encode(payload), verify=False) == payload
+
+    def test_03_leeway_audience_issuer(self):
+        backend = HMACTokenBackend(
+            'HS384', 'ключ', audience='yamdb', issuer='api',
+            leeway=timedelta(seconds=60),
+        )
+        token = backend.encode({'user_id': 1, 'exp': 0})
+        with pytest.raises(TokenBackendError):
+            backend.decode(token)
+        payload = backend.decode(
+            backend.encode({'user_id': 1, 'nbf': 0, 'exp': 4102444800})
+        )
+        assert (payload['aud'], payload['iss']) == ('yamdb', 'api')
+        foreign = HMACTokenBackend('HS384', 'ключ', audience='other')
+        with pytest.raises(TokenBackendError):
+            backend.decode(foreign.encode({'user_id': 1}))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_access_token_only(self, client, user):
+        token = get_token_for_user(user)
+        assert token['token_type'] == 'access'
+        response = client.get(
+            '/api/v1/users/me/', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_05_benchmark_command(self, capsys):
+        call_command('benchmark_jwt', iterations=10)
+        output = capsys.readouterr().out
+        for line in ('pyjwt  issue', 'pyjwt verify', 'hmac  issue',
+                     'hmac verify'):
+            assert line in output
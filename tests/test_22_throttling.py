@@ -0,0 +1,169 @@
+from http import HTTPStatus
+
+import pytest
+from api.throttling import ScopedTokenBucketThrottle
+from reviews.models import Title
+from tests.utils import capture_queries, create_single_review
+from users.models import CustomUser, OutboxEmail
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        ScopedTokenBucketThrottle, 'timer', lambda self: now[0]
+    )
+    return now
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Throttling:
+
+    SIGNUP_URL = '/api/v1/auth/signup/'
+    TOKEN_URL = '/api/v1/auth/token/'
+
+    def test_01_signup_rejected_before_db(self, client, monkeypatch, clock):
+        monkeypatch.setitem(
+            ScopedTokenBucketThrottle.THROTTLE_RATES, 'signup', '3/min'
+        )
+        for idx in range(3):
+            response = client.post(self.SIGNUP_URL, data={
+                'username': f'user{idx}', 'email': f'user{idx}@yamdb.fake'
+            })
+            assert response.status_code == HTTPStatus.OK
+
+        response, queries = capture_queries(
+            client.post, self.SIGNUP_URL, HTTPStatus.TOO_MANY_REQUESTS,
+            data={'username': 'user3', 'email': 'user3@yamdb.fake'},
+        )
+        assert response['Retry-After'] == '20'
+        assert not queries, (
+            'Проверьте, что отклонённый запрос не обращается к БД.'
+        )
+        assert CustomUser.objects.count() == 3
+        assert OutboxEmail.objects.count() == 3
+
+        response = client.post(
+            self.SIGNUP_URL, REMOTE_ADDR='10.0.0.1',
+            data={'username': 'user3', 'email': 'user3@yamdb.fake'},
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что лимит считается отдельно для каждого IP.'
+        )
+
+    def test_02_bucket_refills(self, client, monkeypatch, clock):
+        monkeypatch.setitem(
+            ScopedTokenBucketThrottle.THROTTLE_RATES, 'token', '2/min'
+        )
+        statuses = [
+            client.post(self.TOKEN_URL, data={}).status_code
+            for _ in range(3)
+        ]
+        assert statuses == [
+            HTTPStatus.BAD_REQUEST,
+            HTTPStatus.BAD_REQUEST,
+            HTTPStatus.TOO_MANY_REQUESTS,
+        ]
+        clock[0] += 29
+        response = client.post(self.TOKEN_URL, data={})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        clock[0] += 1
+        response = client.post(self.TOKEN_URL, data={})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что корзина пополняется со временем.'
+        )
+        response = client.post(self.TOKEN_URL, data={})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+    def test_03_writes_per_user(self, user_client, moderator_client,
+                                monkeypatch, clock):
+        monkeypatch.setitem(
+            ScopedTokenBucketThrottle.THROTTLE_RATES, 'reviews', '2/min'
+        )
+        title = Title.objects.create(name='Титаник', year=1997)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data = {'text': 'Текст', 'score': 5}
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.CREATED
+        )
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+        assert user_client.post(url, data=data).status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS
+        ), 'Проверьте, что создание отзывов ограничено для пользователя.'
+        assert user_client.get(url).status_code == HTTPStatus.OK, (
+            'Проверьте, что чтение не ограничивается.'
+        )
+        assert moderator_client.post(url, data=data).status_code == (
+            HTTPStatus.CREATED
+        ), 'Проверьте, что лимит считается отдельно для каждого пользователя.'
+
+    def test_04_forwarded_for_not_trusted(self, client, monkeypatch, clock):
+        monkeypatch.setitem(
+            ScopedTokenBucketThrottle.THROTTLE_RATES, 'token', '2/hour'
+        )
+        statuses = [
+            client.post(
+                self.TOKEN_URL, data={}, HTTP_X_FORWARDED_FOR=f'10.0.0.{idx}'
+            ).status_code
+            for idx in range(3)
+        ]
+        assert statuses[-1] == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что лимит нельзя обойти, меняя заголовок '
+            '`X-Forwarded-For`.'
+        )
+
+    def test_05_bulk_costs_per_item(self, admin_client, user_client,
+                                    monkeypatch, clock):
+        monkeypatch.setitem(
+            ScopedTokenBucketThrottle.THROTTLE_RATES, 'comments_bulk',
+            '3/min'
+        )
+        monkeypatch.setitem(
+            ScopedTokenBucketThrottle.THROTTLE_RATES, 'comments', '1/min'
+        )
+        title = Title.objects.create(name='Титаник', year=1997)
+        review = create_single_review(
+            admin_client, title.id, 'Текст', 5
+        ).json()
+        url = f'/api/v1/titles/{title.id}/reviews/{review["id"]}/comments/'
+        comments = [{'text': f'Комментарий {idx}'} for idx in range(4)]
+
+        response = user_client.post(
+            f'{url}bulk/', data=comments, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что список больше лимита отклоняется со статусом '
+            '400, а не 429, который не пройдёт и при повторе.'
+        )
+        response = user_client.post(
+            f'{url}bulk/', data=comments[:2], format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.post(
+            f'{url}bulk/', data=comments[2:], format='json'
+        )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что массовое создание расходует лимит по одному '
+            'токену на элемент.'
+        )
+        assert response['Retry-After'] == '20'
+        assert user_client.post(url, data=comments[2]).status_code == (
+            HTTPStatus.CREATED
+        ), 'Проверьте, что массовые действия ограничиваются отдельно.'
+
+    def test_06_bulk_rate_fits_max_items(self, admin_client, settings):
+        title = Title.objects.create(name='Титаник', year=1997)
+        response = admin_client.post(
+            f'/api/v1/titles/{title.id}/reviews/bulk/',
+            data=[{'text': 'Текст', 'score': 5}] * 40,
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.MULTI_STATUS, (
+            'Проверьте, что лимит массовых действий не меньше '
+            '`BULK_CREATE_MAX_ITEMS`.'
+        )
+        for scope in ('reviews_bulk', 'comments_bulk'):
+            rate = ScopedTokenBucketThrottle.THROTTLE_RATES[scope]
+            assert int(rate.split('/')[0]) >= settings.BULK_CREATE_MAX_ITEMS
@@ -1,5 +1,8 @@
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 
 check_name_and_slug_patterns = (
     (
@@ -304,4 +307,21 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'Проверьте, что ответ на GET-запрос к `{url_pattern}` содержит '
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
-    )
\ No newline at end of file
+    )
+
+
+def capture_queries(method, url, expected_status=HTTPStatus.OK, **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = method(url, **kwargs)
+    assert response.status_code == expected_status, (
+        f'Проверьте, что запрос к `{url}` возвращает ответ со статусом '
+        f'{expected_status}.'
+    )
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+def select_queries(queries, table):
+    return [
+        query for query in queries
+        if query.startswith('SELECT') and f'FROM "{table}"' in query
+    ]